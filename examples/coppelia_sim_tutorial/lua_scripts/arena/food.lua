@@ -74,6 +74,25 @@ function remote_get_collected_food(inInts, inFloats, inStrings, inBuffer)
     return { food_collected }, {}, {}, ""
 end
 
+function remote_get_food_state(inInts, inFloats, inStrings, inBuffer)
+    -- The amount of food collected, followed by the handles of the food that was eaten
+    local state = { food_collected }
+    for handle, _ in pairs(already_eaten) do
+        state[#state + 1] = handle
+    end
+    return state, {}, {}, ""
+end
+
+function remote_set_food_state(inInts, inFloats, inStrings, inBuffer)
+    -- Undo remote_get_food_state, moving the food itself is up to the caller
+    food_collected = inInts[1]
+    already_eaten = {}
+    for i = 2, #inInts, 1 do
+        already_eaten[inInts[i]] = true
+    end
+    return {}, {}, {}, ""
+end
+
 -- You can define additional system calls here:
 --[[
 function sysCall_suspend()
@@ -68,3 +68,13 @@ readPanPosition = function(inIntegers, inFloats, inStrings, inBuffer)
     posicionPanInt[1] = math.floor(posicionPanFloat) + 180
     return posicionPanInt, {}, {}, ""
 end
+
+stopPan = function(inIntegers, inFloats, inStrings, inBuffer)
+    -- Para el pan y cancela el movimiento en curso, liberando su senal de bloqueo
+    sim.setJointTargetVelocity(motor, 0)
+    if v > 0 then
+        sim.setInt32Signal(signal, 0)
+    end
+    v = 0
+    return {}, {}, {}, ""
+end
@@ -70,3 +70,16 @@ readTiltPosition = function(inIntegers, inFloats, inStrings, inBuffer)
     posicionTiltInt[1] = math.floor(posicionTiltFloat)
     return posicionTiltInt, {}, {}, ""
 end
+
+stopTilt = function(inIntegers, inFloats, inStrings, inBuffer)
+    -- Para el tilt y cancela el movimiento en curso, liberando su senal de bloqueo
+    -- Como al terminar un movimiento, la articulacion se queda controlada en su posicion actual
+    sim.setJointTargetVelocity(motor, 0)
+    if v > 0 then
+        sim.setInt32Signal(signal, 0)
+    end
+    sim.setObjectInt32Param(motor, sim.jointintparam_ctrl_enabled, 1)
+    sim.setJointTargetPosition(motor, sim.getJointPosition(motor))
+    v = 0
+    return {}, {}, {}, ""
+end
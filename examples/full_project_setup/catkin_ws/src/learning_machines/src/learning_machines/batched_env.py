@@ -0,0 +1,121 @@
+import numpy as np
+from gym import spaces
+from stable_baselines3.common.vec_env import VecEnv
+from robobo_interface.fast_sim import KinematicWorld, load_arena
+
+
+class BatchedRoboboEnv(VecEnv):
+    """The task of RoboboEnv for `num_envs` robots at once, in the kinematic simulation.
+
+    All robots are stepped together as arrays, so it is a VecEnv for stable-baselines3
+    that doesn't need a process (or a CoppeliaSim) per robot.
+    Robots that are done are reset on their own, as VecEnvs are expected to.
+
+    Unlike RoboboEnv, which waits for CoppeliaSim steps of 50 ms, each robot drives for its own
+    duration rounded up to `dt`, and its speeds are measured over that time. So `dt` is small,
+    as the durations are only 0-25 ms. The batch as a whole waits for the longest duration,
+    during which the robots with a shorter one stand still.
+    """
+
+    def __init__(self, num_envs=16, arena="arena_obstacles", max_steps=50, dt=0.005, ir_rays=16, seed=None):
+        self.world = KinematicWorld(load_arena(arena), n=num_envs, dt=dt, ir_rays=ir_rays, seed=seed)
+        self.max_steps = max_steps
+        self.current_step = np.zeros(num_envs, dtype=np.int64)
+        self._actions = np.zeros((num_envs, 3), dtype=np.float32)
+        observation_space = spaces.Box(low=0, high=100, shape=(8,), dtype=np.float32)  # IR sensor readings
+        action_space = spaces.Box(low=-1, high=1, shape=(3,), dtype=np.float32)  # left speed, right speed, duration
+        super(BatchedRoboboEnv, self).__init__(num_envs, observation_space, action_space)
+
+    def reset(self):
+        self.world.reset()
+        self.current_step[:] = 0
+        return self._observe()
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.float32).reshape(self.num_envs, 3)
+
+    def step_wait(self):
+        self.current_step += 1
+        actions = self._actions
+
+        # The same ranges as RoboboEnv
+        left_speed = np.clip(actions[:, 0] * 10, -10, 10)
+        right_speed = np.clip(actions[:, 1] * 10, -10, 10)
+        duration = np.clip((actions[:, 2] + 1) / 2 * 25, 0, 25)  # milliseconds
+
+        current_wheels = self.world.read_wheels()
+
+        # RoboboEnv moves (which waits for the movement to finish) and then sleeps as long again.
+        # The wheels stop on the first step after the duration, so that is how long they drove.
+        self.world.command_wheels(None, left_speed, right_speed, duration / 1000.0)
+        steps_driven = np.ceil((duration / 1000.0 - 1e-9) / self.world.dt)
+        self.world.step(int(2 * steps_driven.max()))
+
+        new_wheels = self.world.read_wheels()
+        seconds = np.where(steps_driven > 0, steps_driven * self.world.dt, np.inf)
+        actual_right_speed = (new_wheels[:, 0] - current_wheels[:, 0]) / seconds
+        actual_left_speed = (new_wheels[:, 1] - current_wheels[:, 1]) / seconds
+
+        ir_data = self.world.read_irs()
+        rewards = self.compute_reward(ir_data, actual_left_speed, actual_right_speed)
+        dones = self.is_done(ir_data) | (self.current_step >= self.max_steps)
+
+        observations = ir_data.astype(np.float32)
+        infos = [{} for _ in range(self.num_envs)]
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i]["terminal_observation"] = observations[i]
+            self.world.reset(dones)
+            self.current_step[dones] = 0
+            observations = self._observe()
+        return observations, rewards.astype(np.float32), dones, infos
+
+    def compute_reward(self, ir_data, left_speed, right_speed):
+        # The rewards of RoboboEnv.compute_reward, for all robots at once.
+        # The kinematic simulation is flat, so the robot never tips over.
+        reward = np.zeros(self.num_envs)
+
+        # Collision Penalty
+        reward -= 50 * np.any(ir_data > 500, axis=1)
+
+        # Progress Reward
+        reward += (left_speed != 0) | (right_speed != 0)
+        reward += left_speed == right_speed
+
+        # Idle Penalty
+        min_movement_threshold = 1.0
+        reward -= (np.abs(left_speed) < min_movement_threshold) & (np.abs(right_speed) < min_movement_threshold)
+
+        # Proximity Penalty
+        min_distance_to_obstacle = np.min(ir_data, axis=1)
+        with np.errstate(divide="ignore"):
+            reward -= np.where(min_distance_to_obstacle > 0, 5 * (1 / min_distance_to_obstacle), 0)
+
+        return reward
+
+    def is_done(self, ir_data):
+        # Collision check
+        return np.any(ir_data > 500, axis=1)
+
+    def _observe(self):
+        return self.world.read_irs().astype(np.float32)
+
+    def close(self):
+        pass
+
+    def seed(self, seed=None):
+        self.world.seed(seed)
+        return [seed] * self.num_envs
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
@@ -1,6 +1,8 @@
 import gym
 from stable_baselines3 import PPO
 from .robobo_env import RoboboEnv
+from .batched_env import BatchedRoboboEnv
+from .subproc_env import SubprocRoboboEnv
 from robobo_interface import (
     IRobobo,
     Emotion,
@@ -9,6 +11,7 @@ from robobo_interface import (
     SoundEmotion,
     SimulationRobobo,
     HardwareRobobo,
+    SimulatorPool,
 )   
 
 
@@ -29,3 +32,21 @@ def run(rob: IRobobo):
     train_ppo_with_intervals(env, intervals=2, timesteps_per_interval=100)
 
     env.close()
+
+
+def run_batched(num_envs=16, arena="arena_obstacles"):
+    # The same task, on many kinematic robots at once instead of one robot in CoppeliaSim
+    env = BatchedRoboboEnv(num_envs=num_envs, arena=arena)
+
+    # PPO collects n_steps (2048 by default) steps per robot before every update
+    train_ppo_with_intervals(env, intervals=2, timesteps_per_interval=2048 * num_envs)
+
+    env.close()
+
+
+def run_parallel(num_sims=4, scene="./scenes/arena_obstacles.ttt"):
+    # The same task on several CoppeliaSim instances, each stepped by its own process
+    with SimulatorPool(num_sims, scene) as pool:
+        env = SubprocRoboboEnv(pool.handles)
+        train_ppo_with_intervals(env, intervals=2, timesteps_per_interval=100 * num_sims)
+        env.close()
@@ -9,6 +9,7 @@ from robobo_interface import (
     Orientation,
     WheelPosition
 )
+from robobo_interface.fast_sim import KinematicRobobo
 
 class RoboboEnv(gym.Env):
     def __init__(self, rob: IRobobo, target_position=None, max_steps=50):
@@ -19,12 +20,23 @@ class RoboboEnv(gym.Env):
         self.observation_space = spaces.Box(low=0, high=100, shape=(8,), dtype=np.float32)  # IR sensor readings
         self.max_steps = max_steps
         self.current_step = 0
+        self.episode_saved = False
 
     def reset(self):
-        self.robot.stop_simulation()  # Stop the simulation before resetting
-        self.robot.play_simulation()  # Start the simulation again
-        self.robot.set_position(Position(0, 0, 0), Orientation(0, 0, 0))
-        self.robot.sleep(1)
+        if isinstance(self.robot, SimulationRobobo) and self.episode_saved:
+            # Go back to the start of the first episode, without restarting the simulation
+            self.robot.reset_episode()
+            self.robot.sleep(0.1)
+        else:
+            self.robot.stop_simulation()  # Stop the simulation before resetting
+            self.robot.play_simulation()  # Start the simulation again
+            if not isinstance(self.robot, KinematicRobobo):
+                # The kinematic arenas are not centered on (0, 0), stopping already put it at the start of the arena
+                self.robot.set_position(Position(0, 0, 0), Orientation(0, 0, 0))
+            self.robot.sleep(1)
+            if isinstance(self.robot, SimulationRobobo):
+                self.robot.save_episode_start()
+                self.episode_saved = True
         self.current_step = 0
         ir_data = np.array(self.robot.read_irs())
         return ir_data
@@ -129,3 +141,4 @@ class RoboboEnv(gym.Env):
 
     def close(self):
         self.robot.stop_simulation()
+        self.episode_saved = False
@@ -0,0 +1,161 @@
+import ctypes
+import multiprocessing as mp
+
+import numpy as np
+from gym import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from .robobo_env import RoboboEnv
+
+OBSERVATION_SIZE = 8
+ACTION_SIZE = 3
+
+
+def _shared_array(ctx, ctype, shape):
+    # Memory shared between processes, to send to the workers, and a numpy view on it.
+    raw = ctx.RawArray(ctype, int(np.prod(shape)))
+    return raw, np.ctypeslib.as_array(raw).reshape(shape)
+
+
+def _worker(index, handle, max_steps, remote, parent_remote, shared):
+    parent_remote.close()
+    observations = np.ctypeslib.as_array(shared["observations"]).reshape(-1, OBSERVATION_SIZE)
+    actions = np.ctypeslib.as_array(shared["actions"]).reshape(-1, ACTION_SIZE)
+    rewards = np.ctypeslib.as_array(shared["rewards"])
+    dones = np.ctypeslib.as_array(shared["dones"])
+
+    env = RoboboEnv(handle.connect(), max_steps=max_steps)
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == "step":
+                observation, reward, done, info = env.step(actions[index].copy())
+                if done:
+                    info["terminal_observation"] = np.asarray(observation, dtype=np.float32)
+                    observation = env.reset()
+                observations[index] = observation
+                rewards[index] = reward
+                dones[index] = done
+                # Only the (usually empty) info dict goes through the pipe.
+                remote.send(info)
+            elif command == "reset":
+                observations[index] = env.reset()
+                remote.send(None)
+            elif command == "get_attr":
+                remote.send(getattr(env, data))
+            elif command == "set_attr":
+                remote.send(setattr(env, data[0], data[1]))
+            elif command == "env_method":
+                name, args, kwargs = data
+                remote.send(getattr(env, name)(*args, **kwargs))
+            elif command == "close":
+                env.close()
+                remote.close()
+                break
+            else:
+                raise NotImplementedError(f"`{command}` is not implemented in the worker")
+    except KeyboardInterrupt:
+        pass
+
+
+class SubprocRoboboEnv(VecEnv):
+    """A RoboboEnv per simulator, each in its own process, as one VecEnv.
+
+    Every worker connects its own SimulationRobobo to one of the `handles`
+    (see SimulatorPool), so the simulators all step at the same time.
+    Actions, observations, rewards and dones are passed through shared memory,
+    instead of being pickled through pipes like stable-baselines3's SubprocVecEnv does.
+    """
+
+    def __init__(self, handles, max_steps=50, start_method=None):
+        self.waiting = False
+        self.closed = False
+        num_envs = len(handles)
+
+        if start_method is None:
+            # Same as SubprocVecEnv: forkserver is safer than fork, but not available everywhere.
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+
+        raw_observations, self._observations = _shared_array(ctx, ctypes.c_float, (num_envs, OBSERVATION_SIZE))
+        raw_actions, self._actions = _shared_array(ctx, ctypes.c_float, (num_envs, ACTION_SIZE))
+        raw_rewards, self._rewards = _shared_array(ctx, ctypes.c_float, (num_envs,))
+        raw_dones, self._dones = _shared_array(ctx, ctypes.c_bool, (num_envs,))
+        shared = {
+            "observations": raw_observations,
+            "actions": raw_actions,
+            "rewards": raw_rewards,
+            "dones": raw_dones,
+        }
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(num_envs)])
+        self.processes = []
+        for index, (work_remote, remote, handle) in enumerate(zip(self.work_remotes, self.remotes, handles)):
+            args = (index, handle, max_steps, work_remote, remote, shared)
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        observation_space = spaces.Box(low=0, high=100, shape=(OBSERVATION_SIZE,), dtype=np.float32)  # IR sensor readings
+        action_space = spaces.Box(low=-1, high=1, shape=(ACTION_SIZE,), dtype=np.float32)  # left speed, right speed, duration
+        super(SubprocRoboboEnv, self).__init__(num_envs, observation_space, action_space)
+
+    def step_async(self, actions):
+        self._actions[:] = np.asarray(actions, dtype=np.float32).reshape(self.num_envs, ACTION_SIZE)
+        for remote in self.remotes:
+            remote.send(("step", None))
+        self.waiting = True
+
+    def step_wait(self):
+        infos = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        return self._observations.copy(), self._rewards.copy(), self._dones.copy(), infos
+
+    def reset(self):
+        for remote in self.remotes:
+            remote.send(("reset", None))
+        for remote in self.remotes:
+            remote.recv()
+        return self._observations.copy()
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def seed(self, seed=None):
+        # The simulations are not random, so there is nothing to seed.
+        return [None for _ in range(self.num_envs)]
+
+    def get_attr(self, attr_name, indices=None):
+        remotes = self._get_target_remotes(indices)
+        for remote in remotes:
+            remote.send(("get_attr", attr_name))
+        return [remote.recv() for remote in remotes]
+
+    def set_attr(self, attr_name, value, indices=None):
+        remotes = self._get_target_remotes(indices)
+        for remote in remotes:
+            remote.send(("set_attr", (attr_name, value)))
+        for remote in remotes:
+            remote.recv()
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        remotes = self._get_target_remotes(indices)
+        for remote in remotes:
+            remote.send(("env_method", (method_name, method_args, method_kwargs)))
+        return [remote.recv() for remote in remotes]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+    def _get_target_remotes(self, indices):
+        return [self.remotes[i] for i in self._get_indices(indices)]
@@ -256,6 +256,7 @@ def run_all_actions(rob: IRobobo):
                 'wall_dodge_thresholds': BIG_DODGE_THRESHOLDS
             }
             if isinstance(rob, SimulationRobobo) and simulation:
+                meta_data['physics'] = rob.physics_config()
                 rob.play_simulation()
 
             sensor_readings, task_metadata = task0_group_6(rob, steps=100)
@@ -275,6 +276,7 @@ def run_all_actions(rob: IRobobo):
             'wall_dodge_thresholds': BIG_DODGE_THRESHOLDS
         }
         if isinstance(rob, SimulationRobobo) and simulation:
+            meta_data['physics'] = rob.physics_config()
             rob.play_simulation()
 
         sensor_readings, task_metadata = task0_group_6(rob, steps=100)
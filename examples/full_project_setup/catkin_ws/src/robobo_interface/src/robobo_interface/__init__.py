@@ -7,13 +7,23 @@ from .datatypes import (
     Orientation,
     Position,
     WheelPosition,
+    SensorSnapshot,
+    SensorFrequency,
+    PhysicsEngine,
+    PhysicsConfig,
 )
 from .base import IRobobo
+from .futures import BlockFuture, wait_all, wait_any
 from .hardware import HardwareRobobo
 from .simulation import SimulationRobobo
+from .multi import MultiSimulationRobobo, StackedSensors
+from .pool import SimulatorPool, SimulatorHandle
 
 __all__ = (
     "IRobobo",
+    "BlockFuture",
+    "wait_all",
+    "wait_any",
     "Emotion",
     "SoundEmotion",
     "LedColor",
@@ -22,6 +32,14 @@ __all__ = (
     "Orientation",
     "Position",
     "WheelPosition",
+    "SensorSnapshot",
+    "SensorFrequency",
+    "PhysicsEngine",
+    "PhysicsConfig",
     "HardwareRobobo",
     "SimulationRobobo",
+    "MultiSimulationRobobo",
+    "StackedSensors",
+    "SimulatorPool",
+    "SimulatorHandle",
 )
@@ -1,3 +1,4 @@
+import time
 import functools
 from abc import ABC, abstractmethod
 
@@ -11,10 +12,12 @@ from robobo_interface.datatypes import (
     Orientation,
     WheelPosition,
     SoundEmotion,
+    SensorSnapshot,
 )
-from robobo_interface.utils import LockedSet
+from robobo_interface.futures import BlockFuture
+from robobo_interface.utils import BlockTracker, BlockIdAllocator
 
-from typing import List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple
 from numpy.typing import NDArray
 
 
@@ -29,9 +32,14 @@ class IRobobo(ABC):
     To avoid this, never use a method that has a `blockid` perameter.
     All of these have sister methods that end in `_blocking` instead.
     This will prevent you from doing simulatanious tasks, but decrease complexity.
+
+    If you do want to do simulatanious tasks, the sister methods that end in `_async`
+    return a `BlockFuture` you can wait on, which is easier than managing blockids.
     """
 
-    _used_pids: LockedSet[int]
+    _used_pids: BlockTracker[int]
+    _blockids: BlockIdAllocator
+    _futures: Dict[int, BlockFuture]
 
     @abstractmethod
     def __init__(self, *args, **kwargs) -> None:
@@ -81,6 +89,19 @@ class IRobobo(ABC):
             functools.partial(self.move, left_speed, right_speed, millis)
         )
 
+    def move_async(self, left_speed: int, right_speed: int, millis: int) -> BlockFuture:
+        """Move the robot wheels for `millis` time, without waiting for it to finish.
+
+        Arguments
+        left_speed: speed of the left wheel. Range: -100-0-100. 0 is no movement, negative backward.
+        right_speed: speed of the right wheel. Range: -100-0-100. 0 is no movement, negative backward.
+        millis: how many millisecond to move the robot
+
+        returns:
+            A future that is done once the movement is completed.
+        """
+        return self._future(self.move(left_speed, right_speed, millis))
+
     @abstractmethod
     def reset_wheels(self) -> None:
         """Allows to reset the wheel encoder positions to 0.
@@ -127,11 +148,25 @@ class IRobobo(ABC):
         ...
 
     @abstractmethod
-    def get_image_front(self) -> NDArray[numpy.uint8]:
+    def get_image_front(
+        self,
+        *,
+        out: Optional[NDArray[numpy.uint8]] = None,
+        resolution: Optional[Tuple[int, int]] = None,
+        grayscale: bool = False,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+    ) -> NDArray[numpy.uint8]:
         """Get the image from the front camera as a numpy array in cv2 format.
 
         You can, for example, write this image to file with:
         https://docs.opencv.org/3.4/d4/da8/group__imgcodecs.html#gabbc7ef1aa2edfaa87772f1202d67e0ce
+
+        Arguments:
+        out: if passed, the image is written into this array, which is returned.
+        resolution: (width, height) to scale the image to. The default is that of the camera.
+        grayscale: return a (height, width) grayscale image, instead of (height, width, 3) BGR.
+        roi: (x, y, width, height) of the part of the image to return,
+            with (0, 0) the top left, in pixels of `resolution`.
         """
         ...
 
@@ -166,6 +201,19 @@ class IRobobo(ABC):
             functools.partial(self.set_phone_pan, pan_position, pan_speed)
         )
 
+    def set_phone_pan_async(self, pan_position: int, pan_speed: int) -> BlockFuture:
+        """Command the robot to move the smartphone holder in the horizontal (pan) axis,
+        without waiting for it to finish.
+
+        Arguments
+        pan_position: Angle to position the pan at. Range: 11-343.
+        pan_speed: Movement speed for the pan mechanism. Range: 0-100.
+
+        returns:
+            A future that is done once the pan movement is completed.
+        """
+        return self._future(self.set_phone_pan(pan_position, pan_speed))
+
     @abstractmethod
     def read_phone_pan(self) -> int:
         """Get the current pan of the phone. Range: 0-100"""
@@ -202,6 +250,19 @@ class IRobobo(ABC):
             functools.partial(self.set_phone_tilt, tilt_position, tilt_speed)
         )
 
+    def set_phone_tilt_async(self, tilt_position: int, tilt_speed: int) -> BlockFuture:
+        """Command the robot to move the smartphone holder in the vertical (tilt) axis,
+        without waiting for it to finish.
+
+        Arguments
+        tilt_position: Angle to position the tilt at. Range: 26-109.
+        tilt_speed: Movement speed for the tilt mechanism. Range: 0-100.
+
+        returns:
+            A future that is done once the tilt movement is completed.
+        """
+        return self._future(self.set_phone_tilt(tilt_position, tilt_speed))
+
     @abstractmethod
     def read_phone_tilt(self) -> int:
         """Get the current tilt of the phone. Range: 26-109"""
@@ -222,6 +283,22 @@ class IRobobo(ABC):
         """Get the wheel orientation and speed of the robot"""
         ...
 
+    def read_all(self) -> SensorSnapshot:
+        """Get all proprioceptive sensor readings of the robot at once:
+        IRs, wheels, orientation, acceleration, phone pan and phone tilt.
+
+        By default, this just calls all the individual read methods.
+        Implementations can override this to read them all in one go.
+        """
+        return SensorSnapshot(
+            irs=self.read_irs(),
+            wheels=self.read_wheels(),
+            orientation=self.read_orientation(),
+            accel=self.read_accel(),
+            phone_pan=self.read_phone_pan(),
+            phone_tilt=self.read_phone_tilt(),
+        )
+
     @abstractmethod
     def sleep(self, seconds: float) -> None:
         """Block for a an amount of seconds.
@@ -243,8 +320,7 @@ class IRobobo(ABC):
         f: Callable[[int], None]. Some function to call.
         """
         blockid = f()
-        while self.is_blocked(blockid):
-            self.sleep(0.00000002) # added a 00000
+        self._wait_unblocked(blockid)
 
     @abstractmethod
     def is_blocked(self, blockid: int) -> bool:
@@ -253,33 +329,84 @@ class IRobobo(ABC):
         Arguments:
         blockid: the id to check
         """
-        res = self._sim.getInt32Signal(self._block_string(blockid))
-        if res == 0:
-            self._used_pids.discard(blockid)  # Release the PID
-            print(f"Released blockid {blockid}. Current used PIDs: {self._used_pids}")  # Debug statement
-            return False
-        else:
-            self._used_pids.add(blockid)
-            print(f"Blockid {blockid} is still in use. Current used PIDs: {self._used_pids}")  # Debug statement
-            return True
-
-    
-    # def is_blocked(self, blockid: int) -> bool:
-    #     """See if the robot is currently "blocked", which is to say, performing an action
-
-    #     Arguments:
-    #     blockid: the id to check
-    #     """
-    #     ...
+        ...
 
     @abstractmethod
     def block(self) -> None:
         """Block untill (only return once) all blocking actions are completed"""
         ...
 
-    def _first_unblocked(self):
-        available_pids = set(range(1, 768)) - self._used_pids
-        if not available_pids:
-            raise ValueError(f"No available PIDs. The set of used PIDs is too large. Used PIDs: {self._used_pids}")
-        return min(available_pids)
+    def _wait_unblocked(self, blockid: int, timeout: Optional[float] = None) -> bool:
+        """Wait until the action with this blockid is completed.
+        By default, this polls `is_blocked`.
+        Implementations that get notified when an action completes should override this.
+
+        Arguments:
+        blockid: the id to wait for
+        timeout: the maximum amount of seconds to wait. If None, wait indefinitely.
+
+        returns:
+            whether the action completed before the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.is_blocked(blockid):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            self.sleep(0.002)
+        return True
+
+    def _wait_any_unblocked(
+        self, blockids: List[int], timeout: Optional[float] = None
+    ) -> Optional[int]:
+        """Wait until any of the actions with these blockids is completed.
+        By default, this polls `is_blocked`.
+
+        returns:
+            the blockid of a completed action, or None on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            for blockid in blockids:
+                if not self.is_blocked(blockid):
+                    return blockid
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            self.sleep(0.002)
+
+    def _future(self, blockid: int) -> BlockFuture:
+        """Create a future for an action that was just started"""
+        future = BlockFuture(self, blockid)
+        self._futures[blockid] = future
+        # The action might have been noticed as completed before the future was registered,
+        # in which case nothing would ever complete it, or remove it from `_futures`.
+        if blockid not in self._used_pids:
+            self._complete_future(blockid)
+        return future
+
+    def _complete_future(self, blockid: int) -> None:
+        """Mark the future of this blockid as done, if there is one.
+        Should be called by implementations whenever they notice an action completed.
+        """
+        future = self._futures.pop(blockid, None)
+        if future is not None:
+            future._set_done()
+
+    def _acquire_blockid(self, blockid: Optional[int]) -> int:
+        """Mark a blockid as in use for a new action.
+        If None is passed, an available blockid is chosen.
+        """
+        if blockid in self._used_pids:
+            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
+        if blockid is None:
+            blockid = self._blockids.acquire()
+        else:
+            self._blockids.reserve(blockid)
+        self._used_pids.add(blockid)
+        return blockid
+
+    def _release_blockid(self, blockid: int) -> None:
+        """Mark the action of a blockid as completed, making the blockid available again"""
+        self._used_pids.discard(blockid)
+        self._blockids.release(blockid)
+        self._complete_future(blockid)
 
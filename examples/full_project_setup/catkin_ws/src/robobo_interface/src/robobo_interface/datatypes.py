@@ -1,6 +1,8 @@
 from enum import Enum
 from dataclasses import dataclass
 
+from typing import List, Optional
+
 
 class Emotion(Enum):
     """The emotions the hardware robobo can display
@@ -64,6 +66,27 @@ class LedColor(Enum):
     OFF = "off"
 
 
+class SensorFrequency(Enum):
+    """How often the hardware robobo notifies its sensor readings
+    https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Services#robotsetsensorfrequency
+    """
+
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+    MAX = 3
+
+
+class PhysicsEngine(Enum):
+    """The physics engines CoppeliaSim can simulate with"""
+
+    BULLET = "bullet"
+    ODE = "ode"
+    VORTEX = "vortex"
+    NEWTON = "newton"
+    MUJOCO = "mujoco"
+
+
 @dataclass
 class Acceleration:
     """Acceleration of the robot"""
@@ -99,3 +122,32 @@ class WheelPosition:
     wheel_pos_l: float = 0.0
     wheel_speed_r: float = 0.0
     wheel_speed_l: float = 0.0
+
+
+@dataclass
+class SensorSnapshot:
+    """All proprioceptive sensor readings of the robot, taken together.
+
+    In the simulation, all values are captured in the same simulation step,
+    and `timestamp` is the simulation time of that step.
+    """
+
+    irs: List[Optional[float]]
+    wheels: WheelPosition
+    orientation: Orientation
+    accel: Acceleration
+    phone_pan: int
+    phone_tilt: int
+    timestamp: Optional[float] = None
+
+
+@dataclass
+class PhysicsConfig:
+    """How CoppeliaSim simulates: the time step, whether it runs in real time,
+    the physics engine, and how many physics steps it takes per simulation step.
+    """
+
+    dt: float
+    realtime: bool
+    engine: PhysicsEngine
+    substeps: int
@@ -0,0 +1,12 @@
+from .arenas import Arena, FoodSpawn, ARENAS, load_arena
+from .world import KinematicWorld
+from .kinematic import KinematicRobobo
+
+__all__ = (
+    "Arena",
+    "FoodSpawn",
+    "ARENAS",
+    "load_arena",
+    "KinematicWorld",
+    "KinematicRobobo",
+)
@@ -0,0 +1,155 @@
+import json
+from dataclasses import dataclass, field
+
+import numpy
+
+from typing import Any, Dict, List, Optional, Tuple
+from numpy.typing import NDArray
+
+
+@dataclass
+class FoodSpawn:
+    """Where food is put at the start of every episode.
+    Mirrors `food_random.lua`: uniform over `area`, and food that would land
+    in the lane of the robot (`avoid_y`) is shifted by `shift_y`.
+    """
+
+    area: Tuple[float, float, float, float]
+    avoid_y: Optional[Tuple[float, float]] = None
+    shift_y: float = 0.0
+
+
+@dataclass
+class Arena:
+    """A 2D description of a scene, all distances in meters, angles in degrees.
+
+    bounds: (x_min, y_min, x_max, y_max) of the walls around the arena.
+    obstacles: static boxes, as (center_x, center_y, size_x, size_y, yaw).
+    food: the starting positions of the food, as (x, y).
+    food_size: the side of the (square) food blocks.
+    food_mode: "collect" if food disappears when touched (foraging),
+        "push" if it gets pushed around, or "none" if there is no food.
+    base: the square area food should be pushed to, as (center_x, center_y, size).
+    start: the starting pose of the robot, as (x, y, yaw).
+    food_spawn: if set, the food is put at random positions instead.
+    """
+
+    name: str
+    bounds: Tuple[float, float, float, float]
+    obstacles: List[Tuple[float, float, float, float, float]] = field(default_factory=list)
+    food: List[Tuple[float, float]] = field(default_factory=list)
+    food_size: float = 0.08
+    food_mode: str = "none"
+    base: Optional[Tuple[float, float, float]] = None
+    start: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    food_spawn: Optional[FoodSpawn] = None
+
+    def __post_init__(self) -> None:
+        if self.food_mode not in ("collect", "push", "none"):
+            raise ValueError(f"Invalid food_mode: {self.food_mode}")
+
+    @classmethod
+    def from_dict(cls, description: Dict[str, Any]) -> "Arena":
+        description = dict(description)
+        spawn = description.pop("food_spawn", None)
+        base = description.pop("base", None)
+        return cls(
+            bounds=tuple(description.pop("bounds")),
+            obstacles=[tuple(box) for box in description.pop("obstacles", [])],
+            food=[tuple(pos) for pos in description.pop("food", [])],
+            base=tuple(base) if base is not None else None,
+            start=tuple(description.pop("start", (0.0, 0.0, 0.0))),
+            food_spawn=FoodSpawn(**spawn) if spawn is not None else None,
+            **description,
+        )
+
+    def wall_segments(self) -> NDArray[numpy.float64]:
+        """All static line segments of the arena (walls and obstacles),
+        as an array of shape (S, 4) with rows (x1, y1, x2, y2)
+        """
+        x_min, y_min, x_max, y_max = self.bounds
+        boxes = [((x_min + x_max) / 2, (y_min + y_max) / 2, x_max - x_min, y_max - y_min, 0.0)]
+        return box_segments(numpy.array(boxes + self.obstacles))
+
+
+def box_segments(boxes: NDArray[numpy.float64]) -> NDArray[numpy.float64]:
+    """Turn boxes of shape (..., 5) as (center_x, center_y, size_x, size_y, yaw)
+    into their 4 edges, of shape (... * 4, 4)
+    """
+    boxes = numpy.asarray(boxes, dtype=numpy.float64).reshape(-1, 5)
+    center, size, yaw = boxes[:, None, 0:2], boxes[:, None, 2:4], numpy.radians(boxes[:, 4])
+    corners = numpy.array([[-0.5, -0.5], [0.5, -0.5], [0.5, 0.5], [-0.5, 0.5]]) * size
+    cos, sin = numpy.cos(yaw)[:, None], numpy.sin(yaw)[:, None]
+    rotated = numpy.stack(
+        [corners[..., 0] * cos - corners[..., 1] * sin, corners[..., 0] * sin + corners[..., 1] * cos],
+        axis=-1,
+    )
+    corners = center + rotated
+    return numpy.concatenate([corners, numpy.roll(corners, -1, axis=1)], axis=-1).reshape(-1, 4)
+
+
+def load_arena(name_or_path: str) -> Arena:
+    """Get one of the shipped arenas by scene name (e.g. "arena_obstacles"),
+    or load a description from a JSON file with the same fields as `Arena`.
+    """
+    if name_or_path in ARENAS:
+        return Arena.from_dict(ARENAS[name_or_path])
+    with open(name_or_path) as f:
+        return Arena.from_dict(json.load(f))
+
+
+# The arena all scenes are built on, roughly measured from the scenes.
+# The robot starts in the middle of the arena, in the lane food is kept out of.
+_BOUNDS = (-4.4, -0.5, -1.8, 2.5)
+_START = (-3.1, 0.85, 0.0)
+
+ARENAS: Dict[str, Dict[str, Any]] = {
+    "Robobo_Scene": {
+        "name": "Robobo_Scene",
+        "bounds": _BOUNDS,
+        "start": _START,
+    },
+    "arena_obstacles": {
+        "name": "arena_obstacles",
+        "bounds": _BOUNDS,
+        "start": _START,
+        "obstacles": [
+            (-2.4, 0.85, 0.3, 0.3, 0.0),
+            (-3.8, 0.2, 0.25, 0.4, 30.0),
+            (-2.6, 1.9, 0.4, 0.25, 0.0),
+            (-3.5, 1.7, 0.3, 0.3, 45.0),
+            (-2.3, -0.1, 0.35, 0.2, -20.0),
+            (-4.0, 1.2, 0.2, 0.35, 0.0),
+        ],
+    },
+    "arena_approach": {
+        "name": "arena_approach",
+        "bounds": _BOUNDS,
+        "start": _START,
+        "food_mode": "collect",
+        "food": [(-2.6, 0.2), (-3.6, 0.0), (-2.4, 1.5), (-3.8, 1.6), (-2.9, 1.9), (-3.3, 0.3), (-2.2, 1.2)],
+        "food_spawn": {"area": (-4.1, -0.2, -2.1, 1.8), "avoid_y": (0.6, 1.1), "shift_y": 0.5},
+    },
+    "arena_push_easy": {
+        "name": "arena_push_easy",
+        "bounds": _BOUNDS,
+        "start": _START,
+        "food_mode": "push",
+        "food_size": 0.1,
+        "food": [(-2.7, 0.85)],
+        "base": (-2.05, 0.85, 0.5),
+    },
+    "arena_push_hard": {
+        "name": "arena_push_hard",
+        "bounds": _BOUNDS,
+        "start": _START,
+        "food_mode": "push",
+        "food_size": 0.1,
+        "food": [(-3.0, 1.8)],
+        "base": (-2.05, 0.0, 0.5),
+        "obstacles": [
+            (-2.6, 1.2, 0.5, 0.1, 0.0),
+            (-3.6, 0.4, 0.1, 0.6, 0.0),
+        ],
+    },
+}
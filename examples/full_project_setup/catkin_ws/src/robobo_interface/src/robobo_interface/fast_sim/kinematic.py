@@ -0,0 +1,311 @@
+import math
+
+import numpy
+
+from robobo_interface.base import IRobobo
+from robobo_interface.datatypes import (
+    Emotion,
+    LedColor,
+    LedId,
+    Acceleration,
+    Position,
+    Orientation,
+    WheelPosition,
+    SoundEmotion,
+    SensorSnapshot,
+)
+from robobo_interface.futures import BlockFuture
+from robobo_interface.utils import BlockTracker, BlockIdAllocator
+from robobo_interface.fast_sim.arenas import Arena, load_arena
+from robobo_interface.fast_sim.world import KinematicWorld
+
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from numpy.typing import NDArray
+
+# The simulation has no camera, `get_image_front` returns a black image of this shape.
+IMAGE_SHAPE = (512, 512, 3)
+
+
+class KinematicRobobo(IRobobo):
+    """A Robobo in a 2D kinematic simulation, without CoppeliaSim.
+
+    It has the same methods as `SimulationRobobo`, so code written for that runs
+    on this as well, but many times faster, as it does not simulate physics.
+    The robot drives with the wheel speed model of the Robobo in CoppeliaSim,
+    and the IR sensors use the same intensity model, cast against the arena walls,
+    obstacles and food. There is no camera, so the image is always black.
+
+    Time only advances when waiting: in `sleep`, and when waiting for actions
+    to complete. Every step advances the simulation `dt` seconds.
+    Timeouts are in simulated seconds as well.
+
+    Unlike CoppeliaSim, the simulation starts out running, as there is no scene to load.
+    Stopping the simulation resets the arena, as it does in CoppeliaSim.
+
+    Arguments:
+    arena: the scene name of one of the shipped arenas, a path to a JSON description, or an Arena.
+    dt: the amount of seconds that one simulation step takes.
+    ir_rays: how many rays each IR sensor casts: 16, 8, 4 or 1.
+    seed: the seed for the positions of the food, for arenas where those are random.
+    """
+
+    def __init__(
+        self,
+        arena: Union[str, Arena] = "arena_obstacles",
+        dt: float = 0.05,
+        ir_rays: int = 16,
+        seed: Optional[int] = None,
+        logger: Callable[[str], None] = print,
+    ):
+        self._logger = logger
+        self._used_pids: BlockTracker[int] = BlockTracker()
+        self._blockids = BlockIdAllocator()
+        self._futures: Dict[int, BlockFuture] = {}
+        self._actions: Dict[str, int] = {}
+        self._state = "running"
+
+        if isinstance(arena, str):
+            arena = load_arena(arena)
+        self._world = KinematicWorld(arena, n=1, dt=dt, ir_rays=ir_rays, seed=seed)
+        self._previous_positions = [self._world.poses[0, 0:2].copy()] * 2
+
+    @property
+    def world(self) -> KinematicWorld:
+        """The underlying array based simulation, for when you need more control"""
+        return self._world
+
+    def set_emotion(self, emotion: Emotion) -> None:
+        self._logger(f"The robot shows {emotion.value} on its screen")
+
+    def move(
+        self,
+        left_speed: int,
+        right_speed: int,
+        millis: int,
+        blockid: Optional[int] = None,
+    ) -> int:
+        # Like `SimulationRobobo.move`, this waits for the movement to finish.
+        blockid = self._start_move(left_speed, right_speed, millis, blockid)
+        self._wait_unblocked(blockid)
+        return blockid
+
+    def move_async(self, left_speed: int, right_speed: int, millis: int) -> BlockFuture:
+        return self._future(self._start_move(left_speed, right_speed, millis, None))
+
+    def _start_move(
+        self,
+        left_speed: int,
+        right_speed: int,
+        millis: int,
+        blockid: Optional[int],
+    ) -> int:
+        self._require_running("Cannot move wheels when simulation is not running")
+        blockid = self._start_action("move", blockid)
+        self._world.command_wheels(0, left_speed, right_speed, millis / 1000.0)
+        self._sync_actions()
+        return blockid
+
+    def reset_wheels(self) -> None:
+        self._require_running("Cannot reset wheels when simulation is not running")
+        self._world.reset_wheels(0)
+
+    def talk(self, message: str) -> None:
+        self._logger(f"The robot says: {message}")
+
+    def play_emotion_sound(self, emotion: SoundEmotion) -> None:
+        self._logger(f"The robot makes sound: {emotion.value}")
+
+    def set_led(self, selector: LedId, color: LedColor) -> None:
+        self._require_running("Cannot set leds when simulation is not running")
+
+    def read_irs(self) -> List[Optional[float]]:
+        return self._world.read_irs()[0].tolist()
+
+    def set_ir_resolution(self, rays_per_sensor: int) -> None:
+        """Set how many rays each IR sensor casts: 16, 8, 4 or 1.
+        Like in CoppeliaSim, the intensity model is scaled to give comparable readings.
+        """
+        self._world.set_ir_resolution(rays_per_sensor)
+
+    def read_ir_resolution(self) -> int:
+        return self._world.ir_rays
+
+    def get_image_front(
+        self,
+        *,
+        out: Optional[NDArray[numpy.uint8]] = None,
+        resolution: Optional[Tuple[int, int]] = None,
+        grayscale: bool = False,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+    ) -> NDArray[numpy.uint8]:
+        if out is None:
+            height, width = IMAGE_SHAPE[:2] if resolution is None else (resolution[1], resolution[0])
+            if roi is not None:
+                width, height = roi[2], roi[3]
+            shape = (height, width) if grayscale else (height, width, 3)
+            return numpy.zeros(shape, dtype=numpy.uint8)
+        out[...] = 0
+        return out
+
+    def set_phone_pan(
+        self, pan_position: int, pan_speed: int, blockid: Optional[int] = None
+    ) -> int:
+        self._require_running("Cannot set phone pan when simulation is not running")
+        blockid = self._start_action("pan", blockid)
+        self._world.command_pan(0, pan_position, pan_speed)
+        self._sync_actions()
+        return blockid
+
+    def read_phone_pan(self) -> int:
+        return int(math.floor(self._world.pan[0]))
+
+    def set_phone_tilt(
+        self, tilt_position: int, tilt_speed: int, blockid: Optional[int] = None
+    ) -> int:
+        self._require_running("Cannot set phone tilt when simulation is not running")
+        blockid = self._start_action("tilt", blockid)
+        self._world.command_tilt(0, tilt_position, tilt_speed)
+        self._sync_actions()
+        return blockid
+
+    def read_phone_tilt(self) -> int:
+        return int(math.floor(self._world.tilt[0]))
+
+    def read_accel(self) -> Acceleration:
+        # Like smartphone.lua, the second difference of the position between reads.
+        position = self._world.poses[0, 0:2].copy()
+        before, before_that = self._previous_positions
+        accel = position - 2 * before + before_that
+        self._previous_positions = [position, before]
+        return Acceleration(float(accel[0]), float(accel[1]), 0.0)
+
+    def read_orientation(self) -> Orientation:
+        return Orientation(math.degrees(self._world.poses[0, 2]), 0.0, 0.0)
+
+    def read_wheels(self) -> WheelPosition:
+        right, left = self._world.read_wheels()[0]
+        # Same order as readWheels in left_motor.lua
+        left_command, right_command = self._world.wheel_commands[0]
+        return WheelPosition(int(right), int(left), float(left_command), float(right_command))
+
+    def read_all(self) -> SensorSnapshot:
+        snapshot = super().read_all()
+        snapshot.timestamp = self.get_sim_time()
+        return snapshot
+
+    def sleep(self, seconds: float) -> None:
+        self._require_running("Cannot sleep when simulation is not running")
+        self.step(max(math.ceil(seconds / self._world.dt - 1e-9), 0))
+
+    def step(self, n: int = 1) -> None:
+        """Advance the simulation `n` steps of `dt` seconds"""
+        self._world.step(n)
+        self._sync_actions()
+
+    def is_blocked(self, blockid: int) -> bool:
+        self._sync_actions()
+        return blockid in self._used_pids
+
+    def block(self) -> None:
+        while self._used_pids:
+            self._require_running("Cannot wait for actions when simulation is not running")
+            self.step()
+
+    def _wait_unblocked(self, blockid: int, timeout: Optional[float] = None) -> bool:
+        return self._wait_any_unblocked([blockid], timeout) is not None
+
+    def _wait_any_unblocked(
+        self, blockids: List[int], timeout: Optional[float] = None
+    ) -> Optional[int]:
+        deadline = None if timeout is None else self.get_sim_time() + timeout
+        while True:
+            for blockid in blockids:
+                if blockid not in self._used_pids:
+                    return blockid
+            if deadline is not None and self.get_sim_time() >= deadline:
+                return None
+            self._require_running("Cannot wait for actions when simulation is not running")
+            self.step()
+
+    def _start_action(self, kind: str, blockid: Optional[int]) -> int:
+        # A new command replaces the one that was still running, which then counts as done.
+        previous = self._actions.pop(kind, None)
+        if previous is not None:
+            self._release_blockid(previous)
+        blockid = self._acquire_blockid(blockid)
+        self._actions[kind] = blockid
+        return blockid
+
+    def _sync_actions(self) -> None:
+        busy = {
+            "move": self._world.moving[0],
+            "pan": self._world.panning[0],
+            "tilt": self._world.tilting[0],
+        }
+        for kind, blockid in list(self._actions.items()):
+            if not busy[kind]:
+                del self._actions[kind]
+                self._release_blockid(blockid)
+
+    def _require_running(self, message: str) -> None:
+        if not self.is_running():
+            raise RuntimeError(message)
+
+    def play_simulation(self) -> None:
+        self._state = "running"
+
+    def pause_simulation(self) -> None:
+        self._state = "paused"
+
+    def stop_simulation(self) -> None:
+        self._state = "stopped"
+        self._world.reset(0)
+        self._previous_positions = [self._world.poses[0, 0:2].copy()] * 2
+        for blockid in list(self._actions.values()):
+            self._release_blockid(blockid)
+        self._actions.clear()
+
+    def is_stopped(self) -> bool:
+        return self._state == "stopped"
+
+    def is_paused(self) -> bool:
+        return self._state == "paused"
+
+    def is_running(self) -> bool:
+        return self._state == "running"
+
+    def get_sim_time(self) -> float:
+        return float(self._world.time[0])
+
+    def nr_food_collected(self) -> int:
+        return int(self._world.food_collected[0])
+
+    def get_position(self) -> Position:
+        x, y, _heading = self._world.poses[0]
+        return Position(float(x), float(y), 0.0)
+
+    def get_orientation(self) -> Orientation:
+        """The heading of the robot in degrees is the yaw, like in `read_orientation`"""
+        return self.read_orientation()
+
+    def set_position(self, position: Position, orientation: Orientation) -> None:
+        """Place the robot, the yaw of the orientation is the heading in degrees.
+
+        The arenas are not centered on (0, 0), so positions outside of the walls
+        are moved to the closest position inside them.
+        """
+        self._world.set_poses(0, [position.x, position.y, math.radians(orientation.yaw)])
+        x, y, _heading = self._world.poses[0]
+        if (x, y) != (position.x, position.y):
+            self._logger(
+                f"Position ({position.x}, {position.y}) is outside of the arena, placed the robot at ({x:.2f}, {y:.2f})"
+            )
+
+    def base_position(self) -> Position:
+        if self._world.arena.base is None:
+            raise AttributeError("Scene does not have a base")
+        x, y, _size = self._world.arena.base
+        return Position(x, y, 0.0)
+
+    def base_detects_food(self) -> bool:
+        return bool(self._world.base_detects_food()[0])
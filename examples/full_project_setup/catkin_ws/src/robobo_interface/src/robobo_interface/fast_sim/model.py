@@ -0,0 +1,180 @@
+"""The maths of the kinematic simulation, as array operations over N robots at once.
+
+The wheel, pan and tilt speed models are the ones of the Lua scripts of the Robobo model,
+and the IR intensity model is the one of `ir_back_c.lua`.
+The sizes of the robot are approximations of the Robobo model.
+"""
+
+import numpy
+
+from numpy.typing import NDArray
+
+# Geometry of the robot, in meters.
+WHEEL_RADIUS = 0.032
+AXLE_TRACK = 0.092
+ROBOT_RADIUS = 0.08
+
+# The IR intensity model of ir_back_c.lua: the sum over all rays of a * dist^b
+IR_A = 0.1288
+IR_B = -1.7887
+IR_SUBSENSORS = 16
+IR_RESOLUTIONS = (16, 8, 4, 1)
+IR_NO_DETECTION = 1000000.0
+IR_RANGE = 0.2
+IR_FAN_HALF_ANGLE = numpy.radians(15.0)
+
+# Where the 8 IR sensors are on the robot, in the order read_irs returns them:
+# [BackL, BackR, FrontL, FrontR, FrontC, FrontRR, BackC, FrontLL]
+# as (x, y, heading) relative to the center of the robot, x pointing forward.
+IR_MOUNTS = numpy.array(
+    [
+        [-0.055, 0.04, numpy.radians(150.0)],
+        [-0.055, -0.04, numpy.radians(-150.0)],
+        [0.06, 0.035, numpy.radians(10.0)],
+        [0.06, -0.035, numpy.radians(-10.0)],
+        [0.065, 0.0, 0.0],
+        [0.05, -0.055, numpy.radians(-45.0)],
+        [-0.065, 0.0, numpy.pi],
+        [0.05, 0.055, numpy.radians(45.0)],
+    ]
+)
+
+
+def wheel_speed(speed: NDArray, duration: NDArray) -> NDArray:
+    """The angular speed (rad/s) a wheel is driven at by `moveWheelsByTime`,
+    for a speed command in -100-100 and a duration in seconds.
+    """
+    v = numpy.abs(numpy.clip(speed, -100, 100)).astype(numpy.float64)
+    duration = numpy.asarray(duration, dtype=numpy.float64)
+    steady = 0.000001646 * v**3 - 0.00285 * v**2 + 6.649 * v + 51.14
+    startup = -0.0002912 * v**3 + 0.04647 * v**2 - 1.339 * v - 12.25
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        degrees = steady + numpy.where(duration > 0, startup / duration, 0.0)
+    return numpy.where(v > 0, numpy.sign(speed) * numpy.radians(degrees), 0.0)
+
+
+def pan_speed(angle: NDArray, speed: NDArray) -> NDArray:
+    """The angular speed (deg/s) the pan motor of `pan_motor.lua` moves `angle` degrees at"""
+    v = numpy.asarray(speed, dtype=numpy.float64)
+    offset = -0.000020 * v**3 + 0.001064 * v**2 - 0.330338 * v - 0.890735
+    rate = -0.000031 * v**3 + 0.003877 * v**2 + 0.847465 * v + 8.054684
+    return _joint_speed(angle, offset, rate)
+
+
+def tilt_speed(angle: NDArray, speed: NDArray) -> NDArray:
+    """The angular speed (deg/s) the tilt motor of `tilt_motor.lua` moves `angle` degrees at"""
+    v = numpy.asarray(speed, dtype=numpy.float64)
+    offset = -0.000088 * v**3 + 0.012325 * v**2 - 0.549530 * v + 4.737946
+    rate = 0.000014 * v**3 - 0.002598 * v**2 + 0.480940 * v + 3.181534
+    return _joint_speed(angle, offset, rate)
+
+
+def _joint_speed(angle: NDArray, offset: NDArray, rate: NDArray) -> NDArray:
+    # The motor scripts compute the time the movement takes as (angle - offset) / rate,
+    # if that is not positive, the joint gets there in a single step.
+    angle = numpy.abs(numpy.asarray(angle, dtype=numpy.float64))
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        seconds = (angle - offset) / rate
+        return numpy.where(seconds > 0, angle / seconds, numpy.inf)
+
+
+def drive(poses: NDArray, wheel_speeds: NDArray, dt: float) -> NDArray:
+    """Move the robots over `dt` seconds with a differential drive model.
+
+    Arguments:
+    poses: (N, 3) as (x, y, heading)
+    wheel_speeds: (N, 2) angular speeds of the (left, right) wheels in rad/s.
+    """
+    left, right = wheel_speeds[:, 0] * WHEEL_RADIUS, wheel_speeds[:, 1] * WHEEL_RADIUS
+    forward = (left + right) / 2
+    turn = (right - left) / AXLE_TRACK
+    heading = poses[:, 2]
+    new_heading = heading + turn * dt
+
+    # Follow the arc exactly, or go straight when not turning.
+    turning = numpy.abs(turn) > 1e-9
+    safe_turn = numpy.where(turning, turn, 1.0)
+    dx = numpy.where(
+        turning,
+        forward / safe_turn * (numpy.sin(new_heading) - numpy.sin(heading)),
+        forward * numpy.cos(heading) * dt,
+    )
+    dy = numpy.where(
+        turning,
+        -forward / safe_turn * (numpy.cos(new_heading) - numpy.cos(heading)),
+        forward * numpy.sin(heading) * dt,
+    )
+    new_heading = (new_heading + numpy.pi) % (2 * numpy.pi) - numpy.pi
+    return numpy.stack([poses[:, 0] + dx, poses[:, 1] + dy, new_heading], axis=-1)
+
+
+def ir_rays(rays: int) -> NDArray:
+    """The rays of all IR sensors for a resolution, relative to the robot,
+    of shape (8 * rays, 3) as (x, y, heading).
+    With 1 ray, it is the center one, otherwise they are evenly spread over the fan.
+    """
+    if rays not in IR_RESOLUTIONS:
+        raise ValueError(f"Invalid IR resolution: {rays}. Should be one of {IR_RESOLUTIONS}")
+    fan = numpy.zeros(1) if rays == 1 else numpy.linspace(-IR_FAN_HALF_ANGLE, IR_FAN_HALF_ANGLE, rays)
+    mounts = numpy.repeat(IR_MOUNTS, rays, axis=0)
+    mounts[:, 2] += numpy.tile(fan, len(IR_MOUNTS))
+    return mounts
+
+
+def ray_origins(poses: NDArray, rays: NDArray) -> NDArray:
+    """Put rays relative to the robot (R, 3) in the world, for every pose (N, 3).
+    Returns (N, R, 3) as (x, y, heading)
+    """
+    cos, sin = numpy.cos(poses[:, None, 2]), numpy.sin(poses[:, None, 2])
+    x = poses[:, None, 0] + rays[None, :, 0] * cos - rays[None, :, 1] * sin
+    y = poses[:, None, 1] + rays[None, :, 0] * sin + rays[None, :, 1] * cos
+    return numpy.stack([x, y, poses[:, None, 2] + rays[None, :, 2]], axis=-1)
+
+
+def cast_rays(rays: NDArray, segments: NDArray, max_range: float = IR_RANGE) -> NDArray:
+    """The distance along every ray (N, R, 3) to the closest of the segments (N, S, 4).
+    Returns (N, R), with inf where nothing is hit within `max_range`.
+    Segments containing NaN are never hit.
+    """
+    # Worked out per coordinate, which saves numpy a lot of temporary arrays.
+    dir_x, dir_y = numpy.cos(rays[..., 2])[..., None], numpy.sin(rays[..., 2])[..., None]
+    edge_x = (segments[..., 2] - segments[..., 0])[:, None, :]
+    edge_y = (segments[..., 3] - segments[..., 1])[:, None, :]
+    offset_x = segments[:, None, :, 0] - rays[..., 0, None]
+    offset_y = segments[:, None, :, 1] - rays[..., 1, None]
+
+    denom = dir_x * edge_y - dir_y * edge_x
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        t = (offset_x * edge_y - offset_y * edge_x) / denom
+        u = (offset_x * dir_y - offset_y * dir_x) / denom
+        hit = (t >= 0) & (t <= max_range) & (u >= 0) & (u <= 1) & (numpy.abs(denom) > 1e-12)
+    return numpy.where(hit, t, numpy.inf).min(axis=2, initial=numpy.inf)
+
+
+def ir_intensity(distances: NDArray, rays: int) -> NDArray:
+    """Turn ray distances (N, 8 * rays) into the IR readings (N, 8).
+    With fewer rays, every ray stands for IR_SUBSENSORS / rays rays, as in ir_back_c.lua.
+    """
+    distances = numpy.where(numpy.isfinite(distances), distances, IR_NO_DETECTION)
+    per_ray = IR_A * IR_SUBSENSORS / rays * distances**IR_B
+    return per_ray.reshape(len(distances), len(IR_MOUNTS), rays).sum(axis=-1)
+
+
+def segment_distance(points: NDArray, segments: NDArray) -> NDArray:
+    """The distance of every point (N, 2) to each of its segments (N, S, 4).
+    Returns (N, S), NaN for segments containing NaN.
+    """
+    start, end = segments[..., 0:2], segments[..., 2:4]
+    edge = end - start
+    length = numpy.maximum((edge**2).sum(axis=-1), 1e-12)
+    along = numpy.clip(((points[:, None, :] - start) * edge).sum(axis=-1) / length, 0, 1)
+    closest = start + along[..., None] * edge
+    return numpy.linalg.norm(points[:, None, :] - closest, axis=-1)
+
+
+def square_segments(centers: NDArray, size: float) -> NDArray:
+    """The edges of axis aligned squares around centers (N, F, 2), as (N, F * 4, 4)"""
+    half = size / 2
+    corners = centers[:, :, None, :] + numpy.array([[-half, -half], [half, -half], [half, half], [-half, half]])
+    segments = numpy.concatenate([corners, numpy.roll(corners, -1, axis=2)], axis=-1)
+    return segments.reshape(len(centers), -1, 4)
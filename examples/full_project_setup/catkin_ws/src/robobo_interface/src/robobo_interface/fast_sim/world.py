@@ -0,0 +1,233 @@
+import numpy
+
+from robobo_interface.fast_sim import model
+from robobo_interface.fast_sim.arenas import Arena
+
+from typing import Optional, Union, Sequence
+from numpy.typing import NDArray
+
+# Which robots an operation applies to: all of them (None), some indices, or a boolean mask.
+Envs = Union[None, int, Sequence[int], NDArray]
+
+# Where the phone holder starts, in the units of read_phone_pan and read_phone_tilt.
+PAN_START = 180.0
+TILT_START = 70.0
+
+
+class KinematicWorld:
+    """N independent Robobos, each in its own copy of an arena, simulated as arrays.
+
+    Every step of `dt` seconds moves all robots at once. Robots are stopped by walls
+    and obstacles, but are not stopped by each other: they are in different copies.
+    Food is either collected when touched or pushed away by the robot, depending on
+    the arena. Pushed food does not collide with obstacles, only with the walls.
+    """
+
+    def __init__(
+        self,
+        arena: Arena,
+        n: int = 1,
+        dt: float = 0.05,
+        ir_rays: int = 16,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.arena = arena
+        self.n = n
+        self.dt = dt
+        self._rng = numpy.random.default_rng(seed)
+        walls = arena.wall_segments()
+        self._walls = numpy.broadcast_to(walls, (n,) + walls.shape)
+        self.set_ir_resolution(ir_rays)
+
+        food_count = len(arena.food)
+        self.time = numpy.zeros(n)
+        self.poses = numpy.zeros((n, 3))
+        self.wheel_speeds = numpy.zeros((n, 2))
+        self.wheel_commands = numpy.zeros((n, 2))
+        self.wheel_angles = numpy.zeros((n, 2))
+        self.encoder_offsets = numpy.zeros((n, 2))
+        self.move_start = numpy.zeros(n)
+        self.move_duration = numpy.zeros(n)
+        self.moving = numpy.zeros(n, dtype=bool)
+        self.pan = numpy.zeros(n)
+        self.pan_target = numpy.zeros(n)
+        self.pan_speed = numpy.zeros(n)
+        self.tilt = numpy.zeros(n)
+        self.tilt_target = numpy.zeros(n)
+        self.tilt_speed = numpy.zeros(n)
+        self.food = numpy.zeros((n, food_count, 2))
+        self.food_active = numpy.zeros((n, food_count), dtype=bool)
+        self.food_collected = numpy.zeros(n, dtype=numpy.int64)
+        self.reset()
+
+    def reset(self, envs: Envs = None) -> None:
+        """Put the robots back at the start, with food back in place"""
+        idx = self._indices(envs)
+        x, y, yaw = self.arena.start
+        self.time[idx] = 0.0
+        self.poses[idx] = [x, y, numpy.radians(yaw)]
+        self.wheel_speeds[idx] = 0.0
+        self.wheel_commands[idx] = 0.0
+        self.wheel_angles[idx] = 0.0
+        self.encoder_offsets[idx] = 0.0
+        self.moving[idx] = False
+        self.pan[idx] = self.pan_target[idx] = PAN_START
+        self.tilt[idx] = self.tilt_target[idx] = TILT_START
+        self.pan_speed[idx] = self.tilt_speed[idx] = 0.0
+        self.food_active[idx] = self.arena.food_mode != "none"
+        self.food_collected[idx] = 0
+        self.food[idx] = self._spawn_food(len(idx))
+
+    def seed(self, seed: Optional[int] = None) -> None:
+        """Reseed the random positions of the food"""
+        self._rng = numpy.random.default_rng(seed)
+
+    def set_ir_resolution(self, rays: int) -> None:
+        self._rays = model.ir_rays(rays)
+        self.ir_rays = rays
+
+    def set_poses(self, envs: Envs, poses: NDArray) -> None:
+        """Place robots at (x, y, heading in radians).
+        Positions outside of the walls of the arena are moved to the closest one inside.
+        """
+        idx = self._indices(envs)
+        poses = numpy.array(numpy.broadcast_to(poses, idx.shape + (3,)), dtype=numpy.float64)
+        x_min, y_min, x_max, y_max = self.arena.bounds
+        poses[:, 0] = numpy.clip(poses[:, 0], x_min + model.ROBOT_RADIUS, x_max - model.ROBOT_RADIUS)
+        poses[:, 1] = numpy.clip(poses[:, 1], y_min + model.ROBOT_RADIUS, y_max - model.ROBOT_RADIUS)
+        self.poses[idx] = poses
+
+    def command_wheels(self, envs: Envs, left: NDArray, right: NDArray, seconds: NDArray) -> None:
+        """Drive the wheels at speeds in -100-100 for some seconds, like `moveWheelsByTime`"""
+        idx = self._indices(envs)
+        seconds = numpy.broadcast_to(numpy.asarray(seconds, dtype=numpy.float64), idx.shape)
+        commands = numpy.clip(numpy.stack(numpy.broadcast_arrays(left, right), axis=-1), -100, 100)
+        commands = numpy.broadcast_to(commands, idx.shape + (2,))
+        self.wheel_commands[idx] = commands
+        self.wheel_speeds[idx] = model.wheel_speed(commands, seconds[:, None])
+        self.move_start[idx] = self.time[idx]
+        self.move_duration[idx] = seconds
+        self.moving[idx] = seconds > 0
+        self.wheel_speeds[idx[seconds <= 0]] = 0.0
+
+    def command_pan(self, envs: Envs, position: NDArray, speed: NDArray) -> None:
+        """Move the pan to a position in 20-340, like `movePanTo`"""
+        idx = self._indices(envs)
+        target = numpy.clip(position, 20, 340)
+        self.pan_target[idx] = target
+        self.pan_speed[idx] = numpy.where(
+            numpy.asarray(speed) > 0, model.pan_speed(target - self.pan[idx], numpy.clip(speed, 0, 100)), 0.0
+        )
+
+    def command_tilt(self, envs: Envs, position: NDArray, speed: NDArray) -> None:
+        """Move the tilt to a position in 5-105, like `moveTiltTo`"""
+        idx = self._indices(envs)
+        target = numpy.clip(position, 5, 105)
+        self.tilt_target[idx] = target
+        self.tilt_speed[idx] = numpy.where(
+            numpy.asarray(speed) > 0, model.tilt_speed(target - self.tilt[idx], numpy.clip(speed, 0, 100)), 0.0
+        )
+
+    @property
+    def panning(self) -> NDArray:
+        return (self.pan_speed > 0) & (self.pan != self.pan_target)
+
+    @property
+    def tilting(self) -> NDArray:
+        return (self.tilt_speed > 0) & (self.tilt != self.tilt_target)
+
+    def step(self, steps: int = 1) -> None:
+        """Advance all robots by `steps` steps of `dt` seconds"""
+        for _ in range(steps):
+            self._step()
+
+    def _step(self) -> None:
+        dt = self.dt
+        new_poses = model.drive(self.poses, self.wheel_speeds, dt)
+        blocked = numpy.nanmin(model.segment_distance(new_poses[:, 0:2], self._walls), axis=1) < model.ROBOT_RADIUS
+        new_poses[blocked, 0:2] = self.poses[blocked, 0:2]
+        self.poses = new_poses
+        self.wheel_angles += self.wheel_speeds * dt
+        self._interact_with_food()
+
+        self.pan = _approach(self.pan, self.pan_target, self.pan_speed * dt)
+        self.tilt = _approach(self.tilt, self.tilt_target, self.tilt_speed * dt)
+
+        # Like left_motor.lua, wheels are stopped on the first step after the duration passed.
+        self.time = self.time + dt
+        done = self.moving & (self.time - self.move_start >= self.move_duration - 1e-9)
+        self.moving[done] = False
+        self.wheel_speeds[done] = 0.0
+        self.wheel_commands[done] = 0.0
+
+    def _interact_with_food(self) -> None:
+        if self.arena.food_mode == "none" or self.food.shape[1] == 0:
+            return
+        reach = model.ROBOT_RADIUS + self.arena.food_size / 2
+        offset = self.food - self.poses[:, None, 0:2]
+        distance = numpy.linalg.norm(offset, axis=-1)
+        touching = self.food_active & (distance < reach)
+
+        if self.arena.food_mode == "collect":
+            self.food_active &= ~touching
+            self.food_collected += touching.sum(axis=1)
+            return
+
+        # Push the food out of the robot, and keep it inside the walls.
+        push = numpy.where(touching, reach - distance, 0.0) / numpy.maximum(distance, 1e-9)
+        self.food = self.food + offset * push[..., None]
+        x_min, y_min, x_max, y_max = self.arena.bounds
+        half = self.arena.food_size / 2
+        self.food[..., 0] = numpy.clip(self.food[..., 0], x_min + half, x_max - half)
+        self.food[..., 1] = numpy.clip(self.food[..., 1], y_min + half, y_max - half)
+
+    def read_irs(self) -> NDArray:
+        """The IR readings of all robots, (N, 8)"""
+        rays = model.ray_origins(self.poses, self._rays)
+        segments = self._walls
+        if self.food.shape[1] > 0:
+            food = numpy.where(self.food_active[..., None], self.food, numpy.nan)
+            segments = numpy.concatenate([segments, model.square_segments(food, self.arena.food_size)], axis=1)
+        return model.ir_intensity(model.cast_rays(rays, segments), self.ir_rays)
+
+    def read_wheels(self) -> NDArray:
+        """The wheel encoders of all robots in degrees, (N, 2) as (right, left)"""
+        degrees = numpy.floor(numpy.degrees(self.wheel_angles[:, ::-1]) - self.encoder_offsets[:, ::-1])
+        return degrees.astype(numpy.int64)
+
+    def reset_wheels(self, envs: Envs = None) -> None:
+        idx = self._indices(envs)
+        self.encoder_offsets[idx] = numpy.floor(numpy.degrees(self.wheel_angles[idx]))
+
+    def base_detects_food(self) -> NDArray:
+        """Whether any food is on the base, (N,)"""
+        if self.arena.base is None:
+            raise AttributeError("Arena does not have a base")
+        x, y, size = self.arena.base
+        inside = numpy.all(numpy.abs(self.food - [x, y]) <= size / 2, axis=-1)
+        return numpy.any(inside & self.food_active, axis=1)
+
+    def _spawn_food(self, count: int) -> NDArray:
+        food = numpy.array(self.arena.food, dtype=numpy.float64).reshape(-1, 2)
+        food = numpy.broadcast_to(food, (count,) + food.shape)
+        spawn = self.arena.food_spawn
+        if spawn is None:
+            return food
+        x_min, y_min, x_max, y_max = spawn.area
+        food = self._rng.uniform([x_min, y_min], [x_max, y_max], size=food.shape)
+        if spawn.avoid_y is not None:
+            in_lane = (food[..., 1] > spawn.avoid_y[0]) & (food[..., 1] < spawn.avoid_y[1])
+            food[..., 1] += numpy.where(in_lane, spawn.shift_y, 0.0)
+        return food
+
+    def _indices(self, envs: Envs) -> NDArray:
+        if envs is None:
+            return numpy.arange(self.n)
+        envs = numpy.asarray(envs)
+        if envs.dtype == bool:
+            return numpy.flatnonzero(envs)
+        return numpy.atleast_1d(envs).astype(numpy.int64)
+
+
+def _approach(current: NDArray, target: NDArray, max_delta: NDArray) -> NDArray:
+    return current + numpy.clip(target - current, -max_delta, max_delta)
@@ -0,0 +1,117 @@
+import time
+import threading
+
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    from robobo_interface.base import IRobobo
+
+
+class BlockFuture:
+    """The pending result of a non-blocking action, like `rob.move_async(...)`.
+
+    It is backed by the same completion notification as the `_blocking` methods,
+    so waiting on it returns as soon as the robot reports the action is done.
+
+    Callbacks passed to `add_done_callback` are called with the future as argument.
+    On the hardware, they are called from the ROS thread that received the notification.
+    In the simulation, they are called from whatever thread noticed the action completed,
+    which is to say, from inside `wait`, `done`, `block` and such.
+    """
+
+    def __init__(self, robot: "IRobobo", blockid: int) -> None:
+        self.blockid = blockid
+        self._robot = robot
+        self._lock = threading.Lock()
+        self._done = False
+        self._callbacks: List[Callable[["BlockFuture"], None]] = []
+
+    def done(self) -> bool:
+        """Return whether the action is completed, without waiting"""
+        if not self._done and not self._robot.is_blocked(self.blockid):
+            self._set_done()
+        return self._done
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the action is completed.
+
+        Arguments:
+        timeout: the maximum amount of seconds to wait. If None, wait indefinitely.
+
+        returns:
+            whether the action completed before the timeout
+        """
+        if not self._done and self._robot._wait_unblocked(self.blockid, timeout):
+            self._set_done()
+        return self._done
+
+    def add_done_callback(self, fn: Callable[["BlockFuture"], None]) -> None:
+        """Call `fn(future)` once the action is completed.
+        If it already is, `fn` is called immediately.
+        """
+        with self._lock:
+            if not self._done:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def _set_done(self) -> None:
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(self)
+
+    def __repr__(self) -> str:
+        state = "done" if self._done else "pending"
+        return f"<BlockFuture blockid={self.blockid} {state}>"
+
+
+def wait_all(futures: Sequence[BlockFuture], timeout: Optional[float] = None) -> bool:
+    """Wait until all futures are completed.
+
+    Arguments:
+    futures: the futures to wait for.
+    timeout: the maximum amount of seconds to wait in total. If None, wait indefinitely.
+
+    returns:
+        whether all actions completed before the timeout
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for future in futures:
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        if not future.wait(remaining):
+            return False
+    return True
+
+
+def wait_any(
+    futures: Sequence[BlockFuture], timeout: Optional[float] = None
+) -> Optional[BlockFuture]:
+    """Wait until at least one of the futures is completed.
+    All futures should come from the same robot.
+
+    Arguments:
+    futures: the futures to wait for.
+    timeout: the maximum amount of seconds to wait. If None, wait indefinitely.
+
+    returns:
+        the first completed future, or None if none completed before the timeout
+    """
+    if not futures:
+        raise ValueError("Cannot wait for any of zero futures")
+    robot = futures[0]._robot
+    if any(future._robot is not robot for future in futures):
+        raise ValueError("All futures passed to wait_any should come from the same robot")
+
+    for future in futures:
+        if future._done:
+            return future
+    blockid = robot._wait_any_unblocked([future.blockid for future in futures], timeout)
+    if blockid is None:
+        return None
+    future = next(future for future in futures if future.blockid == blockid)
+    future._set_done()
+    return future
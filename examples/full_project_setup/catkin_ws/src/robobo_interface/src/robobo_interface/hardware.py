@@ -14,6 +14,7 @@ from robobo_msgs.srv import (
     Talk,
     SetLed,
     ResetWheels,
+    SetSensorFrequency,
 )
 from robobo_msgs.msg import IRs, Wheels, OrientationEuler
 
@@ -24,12 +25,15 @@ from robobo_interface.datatypes import (
     LedId,
     Acceleration,
     Orientation,
+    SensorFrequency,
+    SensorSnapshot,
     SoundEmotion,
     WheelPosition,
 )
-from robobo_interface.utils import LockedSet
+from robobo_interface.futures import BlockFuture
+from robobo_interface.utils import BlockTracker, BlockIdAllocator, LatestFrame, SensorHistory
 
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from numpy.typing import NDArray
 
 # https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Services#robotmovewheels
@@ -50,15 +54,37 @@ TALK_SERVICE = "robot/talk"
 # https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Services#robotsetled
 SET_LED_SERVICE = "robot/setLed"
 
+# https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Services#robotsetsensorfrequency
+SET_SENSOR_FREQUENCY_SERVICE = "robot/setSensorFrequency"
+
 # https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Topics#robotcameraimagecompressed
 IMAGE_TOPIC = "robot/camera/image/compressed"
 
+# The imdecode flags for each (camera_scale, camera_grayscale)
+IMAGE_DECODE_FLAGS = {
+    (1, False): cv2.IMREAD_COLOR,
+    (2, False): cv2.IMREAD_REDUCED_COLOR_2,
+    (4, False): cv2.IMREAD_REDUCED_COLOR_4,
+    (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+    (1, True): cv2.IMREAD_GRAYSCALE,
+    (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
 # https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Services#robotsetcamera
 SET_CAMERA_SERVICE = "robot/setCamera"
 
 # https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Topics#robotirs
 IRS_TOPIC = "robot/irs"
 
+# The sensor topics of which a history is kept, and the width of their readings:
+# irs as read_irs, wheels as WheelPosition, orientation as (yaw, pitch, roll), accel as (x, y, z)
+HISTORY_TOPICS = {"irs": 8, "wheels": 4, "orientation": 3, "accel": 3}
+
+# The columns of the history that are angles in degrees, which wrap around when interpolated.
+PERIODIC_COLUMNS = {"irs": (), "wheels": (), "orientation": (0, 1, 2), "accel": ()}
+
 # https://github.com/mintforpeople/robobo-programming/wiki/Robobo-Topics#robotreset_wheels
 WHEEL_RESET_SERVICE = "robot/resetWheels"
 
@@ -115,6 +141,14 @@ class HardwareRobobo(IRobobo):
 
     Arguments you should understand:
     camera: bool = False -> Wether to initialise the camera (this makes it slower)
+    camera_scale: int = 1 -> Decode camera images at 1/1, 1/2, 1/4 or 1/8 of their size,
+        which is several times faster than decoding them whole and resizing.
+    camera_grayscale: bool = False -> Decode camera images as grayscale (height, width) images.
+    camera_worker: bool = False -> Decode every camera image on a background thread as it arrives,
+        instead of when it is read. Costs CPU for frames nobody reads, but reading never waits.
+    history: int = 1024 -> How many readings of each sensor to keep, see `read_history`.
+    sensor_frequency: Optional[SensorFrequency] = None -> How often the Robobo sends its sensor readings.
+        None leaves it at what it is (NORMAL by default). See `set_sensor_frequency`.
 
     Arguments you only have to understand if you want to do advanced stuff:
     xmlrpc_port: Optional[int] = None -> The port to start the xmlrps of the ROS node at.
@@ -132,6 +166,11 @@ class HardwareRobobo(IRobobo):
         xmlrpc_port: Optional[int] = None,
         tcpros_port: Optional[int] = None,
         logger: Callable[[str], None] = rospy.loginfo,
+        camera_scale: int = 1,
+        camera_grayscale: bool = False,
+        camera_worker: bool = False,
+        history: int = 1024,
+        sensor_frequency: Optional[SensorFrequency] = None,
     ) -> None:
         """This sets up the HardwareRobobo, and presumes everything is running
         So, it cannot be started up unless the Robobo is actually connected.
@@ -141,6 +180,9 @@ class HardwareRobobo(IRobobo):
         """
         self._logger = logger
         self._enable_camera: bool = camera
+        if (camera_scale, camera_grayscale) not in IMAGE_DECODE_FLAGS:
+            raise ValueError(f"Invalid camera scale: {camera_scale}. Should be 1, 2, 4 or 8")
+        self._image_decode_flag = IMAGE_DECODE_FLAGS[(camera_scale, camera_grayscale)]
 
         if xmlrpc_port is None:
             xmlrpc_port = int(os.getenv("ROS_XMLRPC_PORT", "45100"))
@@ -162,9 +204,14 @@ class HardwareRobobo(IRobobo):
         self._sound_emotion_srv = rospy.ServiceProxy(PLAY_EMOTION_SERVICE, PlaySound)
         self._talk_srv = rospy.ServiceProxy(TALK_SERVICE, Talk)
         self._leds_srv = rospy.ServiceProxy(SET_LED_SERVICE, SetLed)
+        self._sensor_frequency_srv = rospy.ServiceProxy(
+            SET_SENSOR_FREQUENCY_SERVICE, SetSensorFrequency
+        )
 
         # locking
-        self._used_pids: LockedSet[int] = LockedSet()
+        self._used_pids: BlockTracker[int] = BlockTracker()
+        self._blockids = BlockIdAllocator()
+        self._futures: Dict[int, BlockFuture] = {}
         self._mvunlocksub = rospy.Subscriber(
             UNLOCK_MOVE_TOPIC, Int16, self._unlock_move_callback
         )
@@ -180,6 +227,13 @@ class HardwareRobobo(IRobobo):
         )
 
         # Sensor Receivers
+        self._history = {
+            topic: SensorHistory(width, history) for topic, width in HISTORY_TOPICS.items()
+        }
+        # Preallocated, so `snapshot` doesn't allocate arrays to align the readings in.
+        self._snapshot_values = {
+            topic: numpy.zeros(width, dtype=numpy.float64) for topic, width in HISTORY_TOPICS.items()
+        }
         self._irs_values = [0.0 for _ in range(8)]
         self._irsub = rospy.Subscriber(IRS_TOPIC, IRs, self._irs_callback)
 
@@ -201,11 +255,14 @@ class HardwareRobobo(IRobobo):
         self._wheelsub = rospy.Subscriber(WHEEL_TOPIC, Wheels, self._wheelpos_callback)
 
         if self._enable_camera:
-            self._receiving_image_front = None
+            self._image_front = LatestFrame(self._decode_image, background=camera_worker)
             self._image_subscribe_front = rospy.Subscriber(
                 IMAGE_TOPIC, CompressedImage, self._camera_callback_front, queue_size=1
             )
 
+        if sensor_frequency is not None:
+            self.set_sensor_frequency(sensor_frequency)
+
         self._logger("Succesfully initialised Learning Machines robobo controller node")
 
     def set_emotion(self, emotion: Emotion) -> None:
@@ -238,10 +295,7 @@ class HardwareRobobo(IRobobo):
         returns:
             the blockid
         """
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
+        blockid = self._acquire_blockid(blockid)
         self._move_srv(
             Int8(left_speed), Int8(right_speed), Int32(millis), Int16(blockid)
         )
@@ -279,28 +333,118 @@ class HardwareRobobo(IRobobo):
         """
         self._leds_srv(String(selector.value), String(color.value))
 
+    def set_sensor_frequency(self, frequency: SensorFrequency) -> None:
+        """Set how often the Robobo sends the readings of all its sensors.
+
+        At higher frequencies, the readings are less out of date when you read them,
+        at the cost of more network traffic and battery. Use `measured_rates`
+        to see what rates actually arrive.
+
+        Arguments:
+        frequency: SensorFrequency - LOW, NORMAL (the default on the Robobo), HIGH or MAX
+        """
+        response = self._sensor_frequency_srv(Int8(frequency.value))
+        if response.error.data != 0:
+            raise RuntimeError(
+                f"The Robobo could not set the sensor frequency to {frequency.name}: error {response.error.data}"
+            )
+
+    def measured_rates(self, window: float = 1.0) -> Dict[str, float]:
+        """How many readings per second actually arrived for each sensor topic
+        (see HISTORY_TOPICS), over the last `window` seconds of its history.
+        0.0 for topics with fewer than two readings in that time.
+        """
+        rates = {}
+        for topic, history in self._history.items():
+            latest = history.latest_stamp()
+            stamps = history.between(latest - window)[0] if latest is not None else []
+            if len(stamps) < 2 or stamps[-1] <= stamps[0]:
+                rates[topic] = 0.0
+            else:
+                rates[topic] = (len(stamps) - 1) / float(stamps[-1] - stamps[0])
+        return rates
+
     def read_irs(self) -> List[Optional[float]]:
         """Returns sensor readings:
         [BackL, BackR, FrontL, FrontR, FrontC, FrontRR, BackC, FrontLL]
         """
         return self._irs_values
 
-    def get_image_front(self) -> NDArray[numpy.uint8]:
+    def get_image_front(
+        self,
+        max_age: Optional[float] = None,
+        *,
+        timeout: Optional[float] = 5.0,
+        out: Optional[NDArray[numpy.uint8]] = None,
+        resolution: Optional[Tuple[int, int]] = None,
+        grayscale: bool = False,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+    ) -> NDArray[numpy.uint8]:
         """Get the image from the front camera as a numpy array in cv2 format.
 
+        This is the latest frame the camera sent, which is only decoded now.
+        Reading the same frame twice returns the same array, so copy it before drawing on it.
+        Unless any of `out`, `resolution`, `grayscale` or `roi` is passed,
+        which are applied to a copy. Use `camera_scale` and `camera_grayscale` instead where you can,
+        which are applied while decoding, and are faster.
+
         You can, for example, write this image to file with:
         https://docs.opencv.org/3.4/d4/da8/group__imgcodecs.html#gabbc7ef1aa2edfaa87772f1202d67e0ce
+
+        Arguments
+        max_age: if the latest frame arrived more than this many seconds ago,
+            wait for the next one. If None, any frame will do.
+        timeout: how many seconds to wait for a frame, if it has to. Raises TimeoutError after that,
+            for example when the camera stopped sending. If None, wait indefinitely.
+        out: if passed, the image is written into this array, which is returned.
+        resolution: (width, height) to scale the image to.
+        grayscale: return a (height, width) grayscale image, instead of (height, width, 3) BGR.
+        roi: (x, y, width, height) of the part of the image to return,
+            with (0, 0) the top left, in pixels of `resolution`.
         """
+        frame = self._camera().latest(max_age, timeout)
+        if out is None and resolution is None and not grayscale and roi is None:
+            return frame
+        image = frame
+        if grayscale and image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if resolution is not None:
+            width, height = int(resolution[0]), int(resolution[1])
+            if width <= 0 or height <= 0:
+                raise ValueError(f"Invalid camera resolution: {resolution}")
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        if roi is not None:
+            x, y, roi_width, roi_height = roi
+            height, width = image.shape[:2]
+            inside = 0 <= x and 0 <= y and x + roi_width <= width and y + roi_height <= height
+            if roi_width <= 0 or roi_height <= 0 or not inside:
+                raise ValueError(f"Region of interest {roi} is not inside the image of {width}x{height}")
+            image = image[y : y + roi_height, x : x + roi_width]
+        if out is None:
+            # A crop of the frame itself is still shared with other reads.
+            return image.copy() if numpy.may_share_memory(image, frame) else image
+        if out.shape != image.shape or out.dtype != numpy.uint8:
+            raise ValueError(f"`out` should be a uint8 array of shape {image.shape}, got {out.dtype} {out.shape}")
+        numpy.copyto(out, image)
+        return out
+
+    def wait_for_new_frame(self, timeout: Optional[float] = None) -> NDArray[numpy.uint8]:
+        """Wait for the camera to send a new frame, and return it like `get_image_front`.
+        Raises TimeoutError if no frame arrives within `timeout` seconds.
+        """
+        return self._camera().wait_newer(timeout)
+
+    def _decode_image(self, data: bytes) -> NDArray[numpy.uint8]:
+        # frombuffer doesn't copy the message data, like the deprecated fromstring did.
+        image = cv2.imdecode(numpy.frombuffer(data, numpy.uint8), self._image_decode_flag)
+        if image is None:
+            raise ValueError("Could not decode camera image")
+        return cv2.flip(image, 1)
+
+    def _camera(self) -> LatestFrame:
         if not self._enable_camera:
             raise ValueError("Camera is disabled")
-
-        # Retrieve last image from image topic
-        self._receiving_image_front = None
-        while self._receiving_image_front is None:
-            self.sleep(0.002)
-        image = self._receiving_image_front
-        self._receiving_image_front = None
-        return image
+        return self._image_front
 
     def set_phone_pan(
         self, pan_position: int, pan_speed: int, blockid: Optional[int] = None
@@ -321,10 +465,7 @@ class HardwareRobobo(IRobobo):
         returns:
             the blockid
         """
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
+        blockid = self._acquire_blockid(blockid)
         self._pan_tilt_srv(
             Int16(pan_position),
             Int8(pan_speed),
@@ -359,10 +500,7 @@ class HardwareRobobo(IRobobo):
         returns:
             the blockid
         """
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
+        blockid = self._acquire_blockid(blockid)
         self._pan_tilt_srv(
             Int16(0),
             Int8(0),
@@ -393,6 +531,94 @@ class HardwareRobobo(IRobobo):
         """Get the wheel orientation and speed of the robot"""
         return self._wheelpos
 
+    def read_irs_history(self, n: int) -> Tuple[NDArray[numpy.float64], NDArray[numpy.float64]]:
+        """The last `n` IR readings, oldest first, as their stamps (n,) and values (n, 8).
+        Fewer if not that many have been received yet.
+        """
+        return self._history["irs"].last(n)
+
+    def read_history(
+        self, topic: str, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Tuple[NDArray[numpy.float64], NDArray[numpy.float64]]:
+        """All readings of a sensor taken between `start` and `end` (ROS time, in seconds),
+        as their stamps and values. Only the last `history` readings are kept.
+
+        Arguments
+        topic: one of "irs", "wheels", "orientation", "accel".
+            See HISTORY_TOPICS for the order of the values.
+        start: the earliest stamp to return. None for no limit.
+        end: the last stamp to return. None for no limit.
+        """
+        return self._topic_history(topic).between(start, end)
+
+    def latest(
+        self, topic: str, with_stamp: bool = True
+    ) -> Union[Tuple[float, NDArray[numpy.float64]], NDArray[numpy.float64], None]:
+        """The last reading of a sensor, as (stamp, values), or only the values.
+        None if nothing was received yet.
+
+        All readings are stamped with the ROS time they were received,
+        so the stamps of different topics can be compared.
+        """
+        reading = self._topic_history(topic).latest()
+        if reading is None or with_stamp:
+            return reading
+        return reading[1]
+
+    def snapshot(
+        self,
+        sync: str = "nearest",
+        tolerance: Optional[float] = None,
+        stamp: Optional[float] = None,
+    ) -> SensorSnapshot:
+        """All sensor readings, aligned to the same moment, unlike read_all.
+
+        The topics arrive at different rates, so the latest readings of each were not taken
+        at the same time. This looks them up in the history at one reference stamp instead.
+        Every topic is stamped with the local ROS time its readings were received,
+        so they are aligned on the same clock, never on the header stamps of the phone.
+
+        Arguments
+        sync: "nearest" takes the reading of each topic closest to the stamp,
+            "interpolate" linearly interpolates between the readings before and after it.
+        tolerance: the maximum time in seconds between the stamp and the closest reading
+            of any topic. None for no limit.
+        stamp: the ROS time (as `rospy.get_time`) to align to. If None, the latest moment all topics have a reading for:
+            the earliest of their latest stamps.
+
+        Raises a RuntimeError if a topic has no reading (within `tolerance`).
+        The phone pan and tilt have no history, so they are their latest values.
+        """
+        if sync not in ("nearest", "interpolate"):
+            raise ValueError(f"Invalid sync: {sync}. Should be 'nearest' or 'interpolate'")
+        if stamp is None:
+            latest = [history.latest_stamp() for history in self._history.values()]
+            if None in latest:
+                raise RuntimeError("Not every sensor topic has a reading yet")
+            stamp = min(latest)  # type: ignore
+
+        for topic, values in self._snapshot_values.items():
+            distance = self._history[topic].at(
+                stamp, values, interpolate=sync == "interpolate", periodic=PERIODIC_COLUMNS[topic]
+            )
+            if distance is None or (tolerance is not None and distance > tolerance):
+                raise RuntimeError(f"No {topic} reading within {tolerance} seconds of {stamp}")
+
+        return SensorSnapshot(
+            irs=self._snapshot_values["irs"].tolist(),
+            wheels=WheelPosition(*self._snapshot_values["wheels"].tolist()),
+            orientation=Orientation(*self._snapshot_values["orientation"].tolist()),
+            accel=Acceleration(*self._snapshot_values["accel"].tolist()),
+            phone_pan=self._pan,
+            phone_tilt=self._tilt,
+            timestamp=stamp,
+        )
+
+    def _topic_history(self, topic: str) -> SensorHistory:
+        if topic not in self._history:
+            raise ValueError(f"Unknown topic: {topic}. Should be one of {tuple(HISTORY_TOPICS)}")
+        return self._history[topic]
+
     def read_phone_battery(self) -> float:
         """Get the battety percentage of the phone
 
@@ -431,8 +657,16 @@ class HardwareRobobo(IRobobo):
 
     def block(self) -> None:
         """Block untill (e.g. only return once) all blocking actions are completed"""
-        while len(self._used_pids):
-            self.sleep(0.002)
+        self._used_pids.wait_until_empty()
+
+    def _wait_unblocked(self, blockid: int, timeout: Optional[float] = None) -> bool:
+        # Woken up by `_unlock_move_callback` as soon as the Robobo reports completion.
+        return self._used_pids.wait_for(blockid, timeout)
+
+    def _wait_any_unblocked(
+        self, blockids: List[int], timeout: Optional[float] = None
+    ) -> Optional[int]:
+        return self._used_pids.wait_for_any(blockids, timeout)
 
     def _irs_callback(self, ros_data: IRs) -> None:
         self._irs_values = [
@@ -445,12 +679,13 @@ class HardwareRobobo(IRobobo):
             ros_data.BackC.range,
             ros_data.FrontLL.range,
         ]
+        # Like the topics without a header, stamped with the ROS time it was received.
+        # The header stamps are set by the clock of the phone, which they can't be compared with.
+        self._history["irs"].append(rospy.get_time(), self._irs_values)
 
     def _camera_callback_front(self, ros_data: CompressedImage):
-        if self._receiving_image_front is None:
-            np_arr = numpy.fromstring(ros_data.data, numpy.uint8)
-            image_np = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-            self._receiving_image_front = cv2.flip(image_np, 1)
+        # Only store the frame, it is decoded when it is read.
+        self._image_front.put(ros_data.data, rospy.get_time())
 
     def _pan_callback(self, ros_data: Int16) -> None:
         self._pan = ros_data.data
@@ -464,6 +699,9 @@ class HardwareRobobo(IRobobo):
             y=ros_data.linear.y,
             z=ros_data.linear.z,
         )
+        self._history["accel"].append(
+            rospy.get_time(), (ros_data.linear.x, ros_data.linear.y, ros_data.linear.z)
+        )
 
     def _orient_callback(self, ros_data: OrientationEuler) -> None:
         self._orient = Orientation(
@@ -471,6 +709,9 @@ class HardwareRobobo(IRobobo):
             pitch=ros_data.pitch.data,
             roll=ros_data.roll.data,
         )
+        self._history["orientation"].append(
+            rospy.get_time(), (ros_data.yaw.data, ros_data.pitch.data, ros_data.roll.data)
+        )
 
     def _wheelpos_callback(self, ros_data: Wheels) -> None:
         self._wheelpos = WheelPosition(
@@ -479,9 +720,18 @@ class HardwareRobobo(IRobobo):
             wheel_speed_r=ros_data.wheelSpeedR.data,
             wheel_speed_l=ros_data.wheelSpeedL.data,
         )
+        self._history["wheels"].append(
+            rospy.get_time(),
+            (
+                ros_data.wheelPosR.data,
+                ros_data.wheelPosL.data,
+                ros_data.wheelSpeedR.data,
+                ros_data.wheelSpeedL.data,
+            ),
+        )
 
     def _unlock_move_callback(self, ros_data: Int16) -> None:
-        self._used_pids.discard(ros_data.data)
+        self._release_blockid(ros_data.data)
 
     def _phone_battery_callback(self, ros_data: Int8) -> None:
         self._phone_battery_val = ros_data.data
@@ -0,0 +1,211 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import numpy
+
+from robobo_interface.datatypes import Orientation, Position
+from robobo_interface.futures import BlockFuture
+from robobo_interface.simulation import SimulationRobobo
+
+from typing import Callable, Iterator, List, Optional, Sequence, Union
+from numpy.typing import ArrayLike, NDArray
+
+
+@dataclass
+class StackedSensors:
+    """The sensor readings of K robots, with one row per robot"""
+
+    irs: NDArray[numpy.float64]  # (K, 8)
+    wheels: NDArray[numpy.float64]  # (K, 4) as WheelPosition
+    orientation: NDArray[numpy.float64]  # (K, 3) as yaw, pitch, roll
+    accel: NDArray[numpy.float64]  # (K, 3)
+    phone_pan: NDArray[numpy.int64]  # (K,)
+    phone_tilt: NDArray[numpy.int64]  # (K,)
+    timestamp: NDArray[numpy.float64]  # (K,)
+
+
+class MultiSimulationRobobo:
+    """K Robobos in the same CoppeliaSim scene, controlled over one connection.
+
+    The robots are `/Robobo[<identifier>]` for each of `identifiers`.
+    The methods here act on all robots at once, and take and return arrays with one row
+    per robot. Everything they send is combined into a single round trip to CoppeliaSim.
+    The individual robots are still available as `multi[i]`, or `multi.robots`.
+
+    Arguments are the same as those of SimulationRobobo.
+    """
+
+    def __init__(
+        self,
+        identifiers: Sequence[int] = (0,),
+        api_port: Optional[int] = None,
+        ip_adress: Optional[str] = None,
+        logger: Callable[[str], None] = print,
+        timeout_dur: int = 10,
+        stepping: bool = False,
+    ):
+        if not identifiers:
+            raise ValueError("Need at least one robot")
+        lead = SimulationRobobo(identifiers[0], api_port, ip_adress, logger, timeout_dur, stepping)
+        self.robots: List[SimulationRobobo] = [lead] + [
+            SimulationRobobo(
+                identifier, logger=logger, timeout_dur=timeout_dur, stepping=stepping, client=lead._client
+            )
+            for identifier in identifiers[1:]
+        ]
+
+    def __len__(self) -> int:
+        return len(self.robots)
+
+    def __getitem__(self, index: int) -> SimulationRobobo:
+        return self.robots[index]
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Like `SimulationRobobo.batch`, but for calls to all robots."""
+        lead = self.robots[0]
+        if lead._batch is not None:
+            yield
+            return
+
+        calls: list = []
+        for robot in self.robots:
+            robot._batch = calls
+            robot._batch_needs_running = False
+        try:
+            yield
+        finally:
+            needs_running = any(robot._batch_needs_running for robot in self.robots)
+            for robot in self.robots:
+                robot._batch = None
+        lead._batch_needs_running = needs_running
+        lead._run_batch(calls)
+
+    def move(self, left_speeds: ArrayLike, right_speeds: ArrayLike, millis: ArrayLike) -> List[BlockFuture]:
+        """Start moving the wheels of all robots, without waiting for it to finish.
+        Speeds and durations are either one value for all robots, or one per robot.
+
+        returns:
+            A future per robot, done once its movement is completed.
+        """
+        left, right, duration = self._per_robot(left_speeds, right_speeds, millis)
+        with self.batch():
+            return [
+                robot.move_async(int(l), int(r), int(d))
+                for robot, l, r, d in zip(self.robots, left, right, duration)
+            ]
+
+    def move_blocking(self, left_speeds: ArrayLike, right_speeds: ArrayLike, millis: ArrayLike) -> None:
+        """Move the wheels of all robots, and wait until all of them are done"""
+        self.move(left_speeds, right_speeds, millis)
+        self.block()
+
+    def set_phone_pan(self, pan_positions: ArrayLike, pan_speeds: ArrayLike) -> List[BlockFuture]:
+        """Start moving the pan of all robots, see `SimulationRobobo.set_phone_pan`"""
+        positions, speeds = self._per_robot(pan_positions, pan_speeds)
+        with self.batch():
+            return [
+                robot.set_phone_pan_async(int(p), int(s))
+                for robot, p, s in zip(self.robots, positions, speeds)
+            ]
+
+    def set_phone_tilt(self, tilt_positions: ArrayLike, tilt_speeds: ArrayLike) -> List[BlockFuture]:
+        """Start moving the tilt of all robots, see `SimulationRobobo.set_phone_tilt`"""
+        positions, speeds = self._per_robot(tilt_positions, tilt_speeds)
+        with self.batch():
+            return [
+                robot.set_phone_tilt_async(int(p), int(s))
+                for robot, p, s in zip(self.robots, positions, speeds)
+            ]
+
+    def read_irs(self) -> NDArray[numpy.float64]:
+        """The IR readings of all robots, (K, 8)"""
+        with self.batch():
+            results = [robot.read_irs() for robot in self.robots]
+        return numpy.array([result.value for result in results], dtype=numpy.float64)  # type: ignore
+
+    def read_wheels(self) -> NDArray[numpy.float64]:
+        """The wheels of all robots, (K, 4) in the order of WheelPosition"""
+        with self.batch():
+            results = [robot.read_wheels() for robot in self.robots]
+        return numpy.array(
+            [[wheels.wheel_pos_r, wheels.wheel_pos_l, wheels.wheel_speed_r, wheels.wheel_speed_l]
+             for wheels in (result.value for result in results)],  # type: ignore
+            dtype=numpy.float64,
+        )
+
+    def read_all(self) -> StackedSensors:
+        """All proprioceptive sensors of all robots, see `SimulationRobobo.read_all`"""
+        with self.batch():
+            results = [robot.read_all() for robot in self.robots]
+        snapshots = [result.value for result in results]  # type: ignore
+        return StackedSensors(
+            irs=numpy.array([s.irs for s in snapshots], dtype=numpy.float64),
+            wheels=numpy.array(
+                [[s.wheels.wheel_pos_r, s.wheels.wheel_pos_l, s.wheels.wheel_speed_r, s.wheels.wheel_speed_l]
+                 for s in snapshots],
+                dtype=numpy.float64,
+            ),
+            orientation=numpy.array(
+                [[s.orientation.yaw, s.orientation.pitch, s.orientation.roll] for s in snapshots],
+                dtype=numpy.float64,
+            ),
+            accel=numpy.array([[s.accel.x, s.accel.y, s.accel.z] for s in snapshots], dtype=numpy.float64),
+            phone_pan=numpy.array([s.phone_pan for s in snapshots], dtype=numpy.int64),
+            phone_tilt=numpy.array([s.phone_tilt for s in snapshots], dtype=numpy.int64),
+            timestamp=numpy.array([s.timestamp for s in snapshots], dtype=numpy.float64),
+        )
+
+    def get_positions(self) -> NDArray[numpy.float64]:
+        """The positions of all robots in the scene, (K, 3)"""
+        with self.batch():
+            results = [robot.get_position() for robot in self.robots]
+        return numpy.array(
+            [[p.x, p.y, p.z] for p in (result.value for result in results)],  # type: ignore
+            dtype=numpy.float64,
+        )
+
+    def set_positions(self, positions: ArrayLike, orientations: ArrayLike) -> None:
+        """Place all robots, with rows of (x, y, z) and (yaw, pitch, roll)"""
+        positions = numpy.broadcast_to(numpy.asarray(positions, dtype=numpy.float64), (len(self), 3))
+        orientations = numpy.broadcast_to(numpy.asarray(orientations, dtype=numpy.float64), (len(self), 3))
+        with self.batch():
+            for robot, position, orientation in zip(self.robots, positions, orientations):
+                robot.set_position(Position(*position.tolist()), Orientation(*orientation.tolist()))
+
+    def block(self) -> None:
+        """Wait until the actions of all robots are completed,
+        checking on all of them in one round trip at a time.
+        """
+        lead = self.robots[0]
+        lead._require_not_batching("Cannot wait for actions inside a batch")
+        idle = lead._idler()
+        while True:
+            pending = [robot for robot in self.robots if robot.pending_blockids()]
+            if not pending:
+                return
+            with self.batch():
+                for robot in pending:
+                    robot.completed_blockids()
+            if any(robot.pending_blockids() for robot in pending):
+                idle()
+
+    def sleep(self, seconds: float) -> None:
+        self.robots[0].sleep(seconds)
+
+    def step(self, n: int = 1) -> None:
+        self.robots[0].step(n)
+
+    def play_simulation(self) -> None:
+        for robot in self.robots[1:]:
+            robot._restore_signals()
+        self.robots[0].play_simulation()
+
+    def stop_simulation(self) -> None:
+        self.robots[0].stop_simulation()
+
+    def is_running(self) -> bool:
+        return self.robots[0].is_running()
+
+    def _per_robot(self, *values: Union[ArrayLike, float]) -> List[NDArray]:
+        return [numpy.broadcast_to(numpy.asarray(value), (len(self),)) for value in values]
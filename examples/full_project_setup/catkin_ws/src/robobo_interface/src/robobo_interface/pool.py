@@ -0,0 +1,267 @@
+import os
+import time
+import signal
+import socket
+import subprocess
+import threading
+from dataclasses import dataclass
+
+import zmq
+from coppeliasim_zmqremoteapi_client import RemoteAPIClient
+
+from robobo_interface.simulation import SimulationRobobo
+
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class SimulatorHandle:
+    """Where to find one CoppeliaSim instance of a pool.
+    Unlike a SimulationRobobo, this can be sent to other processes,
+    which can then connect to the simulator themselves.
+    """
+
+    index: int
+    port: int
+    ip_adress: str
+
+    def connect(self, **kwargs: Any) -> SimulationRobobo:
+        """Connect a SimulationRobobo to this simulator.
+        Keyword arguments are passed on to SimulationRobobo.
+        """
+        return SimulationRobobo(api_port=self.port, ip_adress=self.ip_adress, **kwargs)
+
+
+class SimulatorPool:
+    """N local CoppeliaSim instances, on ports `base_port`, `base_port + 1`, etc.
+
+    If a scene is passed, instances are started with `scripts/start_coppelia_sim.sh`,
+    like you would by hand, except for ports that already have a simulator running,
+    which are used as they are. Without a scene, the pool only attaches to running instances.
+
+    Use `handles` to hand the instances out to worker processes,
+    `health_check` to see which are still responding, and `restart_dead` (or `watch`)
+    to start the ones that died again. The ones the pool started are stopped on `close`.
+    ```
+    with SimulatorPool(4, "./scenes/arena_obstacles.ttt") as pool:
+        with multiprocessing.Pool(len(pool)) as p:
+            p.map(train, pool.handles)
+    ```
+
+    Arguments:
+    size: the amount of instances.
+    scene: the scene to start instances with. If None, only attach to running instances.
+    base_port: the port of the first instance.
+    headless: whether to start instances without GUI.
+    script: the script that starts CoppeliaSim, called as `script scene port [-h]`
+    ip_adress: where the instances run. Defaults to COPPELIA_SIM_IP, like SimulationRobobo.
+    startup_timeout: how long to wait for an instance to accept connections.
+    response_timeout: how long an instance may take to answer a health check,
+        after which it is considered hung.
+    log_dir: if set, the output of each started instance is written to `coppelia_<port>.log` here.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        scene: Optional[str] = None,
+        base_port: int = 20000,
+        headless: bool = True,
+        script: str = "./scripts/start_coppelia_sim.sh",
+        ip_adress: Optional[str] = None,
+        startup_timeout: float = 60.0,
+        response_timeout: float = 5.0,
+        log_dir: Optional[str] = None,
+        logger: Callable[[str], None] = print,
+    ):
+        if ip_adress is None:
+            ip_adress = os.getenv("COPPELIA_SIM_IP", "0.0.0.0")
+        self._scene = scene
+        self._headless = headless
+        self._script = script
+        self._startup_timeout = startup_timeout
+        self._response_timeout = response_timeout
+        self._log_dir = log_dir
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self.restarts = 0
+
+        self.handles: List[SimulatorHandle] = [
+            SimulatorHandle(i, base_port + i, ip_adress) for i in range(size)
+        ]
+        try:
+            for handle in self.handles:
+                if not self._responds(handle):
+                    self._launch(handle)
+            for handle in self.handles:
+                self._wait_until_up(handle)
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return len(self.handles)
+
+    def __enter__(self) -> "SimulatorPool":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
+
+    def connect(self, index: int, **kwargs: Any) -> SimulationRobobo:
+        """Connect a SimulationRobobo to instance `index` in this process"""
+        return self.handles[index].connect(**kwargs)
+
+    def health_check(self) -> List[bool]:
+        """Whether each instance is alive and answering remote API calls"""
+        return [self._is_healthy(handle) for handle in self.handles]
+
+    def restart_dead(self) -> List[int]:
+        """Restart the instances that are not healthy.
+
+        returns:
+            the indices of the restarted instances
+        """
+        return [handle.index for handle in self.handles if self._restart_if_dead(handle)]
+
+    def restart(self, index: int) -> None:
+        """Stop and start instance `index` again, for example when it hangs"""
+        with self._lock:
+            self._restart(self.handles[index])
+
+    def watch(self, interval: float = 5.0) -> None:
+        """Health check all instances every `interval` seconds in the background,
+        and restart those that died, until the pool is closed.
+        Instances that cannot be restarted are logged, and tried again the next time.
+        """
+        if self._watcher is not None:
+            return
+
+        def loop() -> None:
+            while not self._stop_watching.wait(interval):
+                for handle in self.handles:
+                    if self._stop_watching.is_set():
+                        break
+                    try:
+                        if self._restart_if_dead(handle):
+                            self._logger(f"Restarted CoppeliaSim instance {handle.index}")
+                    except Exception as e:
+                        self._logger(f"Could not restart CoppeliaSim instance {handle.index}: {e}")
+
+        self._watcher = threading.Thread(target=loop, name="SimulatorPool.watch", daemon=True)
+        self._watcher.start()
+
+    def close(self) -> None:
+        """Stop watching, and stop all instances this pool started"""
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+        with self._lock:
+            for index in list(self._processes):
+                self._terminate(index)
+
+    def _restart_if_dead(self, handle: SimulatorHandle) -> bool:
+        with self._lock:
+            if self._is_healthy(handle):
+                return False
+            self._restart(handle)
+            return True
+
+    def _restart(self, handle: SimulatorHandle) -> None:
+        if self._scene is None:
+            raise RuntimeError(
+                f"Cannot restart the simulator at port {handle.port}, as the pool was not given a scene"
+            )
+        attached = handle.index not in self._processes
+        self._terminate(handle.index)
+        if attached and self._accepts_connections(handle):
+            # Not started by the pool, so it cannot be stopped, and a new one cannot take its port.
+            raise RuntimeError(
+                f"The simulator at port {handle.port} is not responding, "
+                "but was not started by the pool, so it has to be stopped by hand"
+            )
+        self._launch(handle)
+        self._wait_until_up(handle)
+        self.restarts += 1
+
+    def _launch(self, handle: SimulatorHandle) -> None:
+        if self._scene is None:
+            raise RuntimeError(
+                f"No simulator running at port {handle.port}, and the pool was not given a scene to start one"
+            )
+        command = ["bash", self._script, self._scene, str(handle.port)]
+        if self._headless:
+            command.append("-h")
+        output = subprocess.DEVNULL
+        if self._log_dir is not None:
+            output = open(os.path.join(self._log_dir, f"coppelia_{handle.port}.log"), "ab")
+        # In its own process group, so the simulator it starts is stopped with it.
+        self._processes[handle.index] = subprocess.Popen(
+            command, stdin=subprocess.DEVNULL, stdout=output, stderr=subprocess.STDOUT, start_new_session=True
+        )
+        if output is not subprocess.DEVNULL:
+            output.close()
+        self._logger(f"Starting CoppeliaSim at port {handle.port}")
+
+    def _terminate(self, index: int) -> None:
+        process = self._processes.pop(index, None)
+        if process is None or process.poll() is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+        except ProcessLookupError:
+            pass
+
+    def _wait_until_up(self, handle: SimulatorHandle) -> None:
+        deadline = time.monotonic() + self._startup_timeout
+        while not self._responds(handle):
+            process = self._processes.get(handle.index)
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(
+                    f"CoppeliaSim at port {handle.port} exited with code {process.returncode} while starting"
+                )
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"CoppeliaSim at port {handle.port} did not start in time")
+            time.sleep(0.5)
+
+    def _is_healthy(self, handle: SimulatorHandle) -> bool:
+        process = self._processes.get(handle.index)
+        if process is not None and process.poll() is not None:
+            return False
+        return self._responds(handle)
+
+    def _accepts_connections(self, handle: SimulatorHandle) -> bool:
+        try:
+            with socket.create_connection((handle.ip_adress, handle.port), timeout=1.0):
+                return True
+        except OSError:
+            return False
+
+    def _responds(self, handle: SimulatorHandle) -> bool:
+        if not self._accepts_connections(handle):
+            return False
+        # Connections are also accepted while the scene is still loading, or when the simulator hangs,
+        # so it has to answer an actual call in time. The client itself would wait for minutes.
+        client = RemoteAPIClient(host=handle.ip_adress, port=handle.port)
+        timeout_ms = int(self._response_timeout * 1000)
+        client.socket.setsockopt(zmq.RCVTIMEO, timeout_ms)
+        client.socket.setsockopt(zmq.SNDTIMEO, timeout_ms)
+        client.socket.setsockopt(zmq.LINGER, 0)
+        try:
+            client.require("sim").getSimulationState()
+            return True
+        except Exception:
+            # zmq.Again when it did not answer in time
+            return False
+        finally:
+            client.socket.close()
+            client.context.term()
@@ -1,7 +1,10 @@
 import os
 import sys
+import math
 import time
 import signal
+from contextlib import contextmanager
+
 import cv2
 import numpy
 from robobo_interface.base import IRobobo
@@ -14,16 +17,54 @@ from robobo_interface.datatypes import (
     Orientation,
     WheelPosition,
     SoundEmotion,
+    SensorSnapshot,
+    PhysicsEngine,
+    PhysicsConfig,
 )
-from robobo_interface.utils import LockedSet
+from robobo_interface.futures import BlockFuture
+from robobo_interface.utils import BlockTracker, BlockIdAllocator
 from coppeliasim_zmqremoteapi_client import RemoteAPIClient
-from typing import Callable, List, NoReturn, Optional, TypeVar
+from typing import Any, Callable, Dict, FrozenSet, Generic, Iterable, Iterator, List, NoReturn, Optional, Set, Tuple, TypeVar, Union
 from numpy.typing import NDArray
 
 T = TypeVar("T")
 
+# The amount of proximity rays per IR sensor the simulation supports, the first is the default.
+IR_RESOLUTIONS = (16, 8, 4, 1)
+
+
+class BatchResult(Generic[T]):
+    """The result of a call made inside `SimulationRobobo.batch()`.
+    The value is only available after the batch is sent, which is to say, after the `with` block.
+    """
+
+    def __init__(self, parse: Callable[[List[Any]], T]) -> None:
+        self._parse = parse
+        self._ready = False
+        self._value: Optional[T] = None
+
+    @property
+    def value(self) -> T:
+        if not self._ready:
+            raise RuntimeError("The batch this result is part of has not been sent yet")
+        return self._value  # type: ignore
+
+    def _set(self, ret: List[Any]) -> None:
+        self._value = self._parse(ret)
+        self._ready = True
+
 
 class SimulationRobobo(IRobobo):
+    """The class to use to interact with a Robobo in CoppeliaSim.
+
+    Arguments you only have to understand if you want to do advanced stuff:
+    identifier: int = 0 -> Which robot of the scene to control, `/Robobo[<identifier>]`
+    client: Optional[RemoteAPIClient] = None -> An already connected client to use,
+        for example the one of another robot in the same scene.
+        If passed, `api_port` and `ip_adress` are ignored.
+    render_on_demand: bool = False -> See `set_render_on_demand`
+    """
+
     def __init__(
         self,
         identifier: int = 0,
@@ -31,10 +72,19 @@ class SimulationRobobo(IRobobo):
         ip_adress: Optional[str] = None,
         logger: Callable[[str], None] = print,
         timeout_dur: int = 10,
+        stepping: bool = False,
+        ir_rays: Optional[int] = None,
+        client: Optional[RemoteAPIClient] = None,
+        render_on_demand: bool = False,
     ):
         self._logger = logger
-        self._used_pids: LockedSet[int] = LockedSet()
+        self._used_pids: BlockTracker[int] = BlockTracker()
+        self._blockids = BlockIdAllocator()
+        self._futures: Dict[int, BlockFuture] = {}
         self._identifier = f"[{identifier}]"
+        self._batch: Optional[List[Tuple[List[Any], BatchResult]]] = None
+        self._batch_needs_running = False
+        self._ir_rays: Optional[int] = None
 
         if api_port is None:
             api_port = int(os.getenv("COPPELIA_SIM_PORT", "23000"))
@@ -42,12 +92,15 @@ class SimulationRobobo(IRobobo):
         if ip_adress is None:
             ip_adress = os.getenv("COPPELIA_SIM_IP", "0.0.0.0")
 
-        try:
-            self._client = timeout(
-                lambda: RemoteAPIClient(host=ip_adress, port=api_port), timeout_dur
-            )
-        except TimeoutError:
-            self._fail_connect(api_port, ip_adress)
+        if client is not None:
+            self._client = client
+        else:
+            try:
+                self._client = timeout(
+                    lambda: RemoteAPIClient(host=ip_adress, port=api_port), timeout_dur
+                )
+            except TimeoutError:
+                self._fail_connect(api_port, ip_adress)
 
         try:
             self._sim = timeout(lambda: self._client.require("sim"), timeout_dur)
@@ -55,6 +108,13 @@ class SimulationRobobo(IRobobo):
             self._fail_connect(api_port, ip_adress)
 
         self._initialise_handles()
+        self._stepping = False
+        self.set_stepping(stepping)
+        if ir_rays is not None:
+            self.set_ir_resolution(ir_rays)
+        self._render_on_demand = False
+        if render_on_demand:
+            self.set_render_on_demand(True)
         self._logger(
             f"""Connected to remote CoppeliaSim API server at port {api_port}
             Connected to robot: {self._identifier}"""
@@ -70,51 +130,46 @@ class SimulationRobobo(IRobobo):
         millis: int,
         blockid: Optional[int] = None,
     ) -> int:
-        if not self.is_running():
-            raise RuntimeError("Cannot move wheels when simulation is not running")
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
-        print(f"Added blockid {blockid} to _used_pids: {self._used_pids}")
-
-        self._sim.callScriptFunction(
-            "moveWheelsByTime",
-            self._wheels_script,
-            [right_speed, left_speed],
-            [millis / 1000.0],
-            [self._block_string(blockid)],
-            bytearray(),
-        )
+        blockid = self._start_move(left_speed, right_speed, millis, blockid)
 
         try:
             self.block_until_free(blockid)
-        except Exception as e:
-            print(f"Error in block_until_free: {e}")
-            self._used_pids.discard(blockid)
+        except Exception:
+            self._release_blockid(blockid)
             raise
 
         return blockid
 
+    def move_async(self, left_speed: int, right_speed: int, millis: int) -> BlockFuture:
+        # `move` waits for the movement to finish, which would defeat the point.
+        return self._future(self._start_move(left_speed, right_speed, millis, None))
+
+    def _start_move(
+        self,
+        left_speed: int,
+        right_speed: int,
+        millis: int,
+        blockid: Optional[int],
+    ) -> int:
+        self._require_running("Cannot move wheels when simulation is not running")
+        blockid = self._acquire_blockid(blockid)
 
+        self._call_script(
+            "moveWheelsByTime",
+            self._wheels_script,
+            ints=[right_speed, left_speed],
+            floats=[millis / 1000.0],
+            strings=[self._block_string(blockid)],
+        )
+        return blockid
 
     def block_until_free(self, blockid: int) -> None:
-        while self.is_blocked(blockid):
-            time.sleep(0.000002)
-        print(f"Blockid {blockid} is now free. Current used PIDs: {self._used_pids}")
-        self._used_pids.discard(blockid)
+        self._wait_unblocked(blockid)
+        self._release_blockid(blockid)
 
     def reset_wheels(self) -> None:
-        if not self.is_running():
-            raise RuntimeError("Cannot reset wheels when simulation is not running")
-        self._sim.callScriptFunction(
-            "resetWheelEncoders",
-            self._wheels_script,
-            [],
-            [],
-            [],
-            bytearray(),
-        )
+        self._require_running("Cannot reset wheels when simulation is not running")
+        self._call_script("resetWheelEncoders", self._wheels_script)
 
     def talk(self, message: str) -> None:
         self._logger(f"The robot {self._identifier} says: {message}")
@@ -123,156 +178,463 @@ class SimulationRobobo(IRobobo):
         self._logger(f"The robot {self._identifier} makes sound: {emotion.value}")
 
     def set_led(self, selector: LedId, color: LedColor) -> None:
-        if not self.is_running():
-            raise RuntimeError("Cannot set leds when simulation is not running")
-        self._sim.callScriptFunction(
-            "setLEDColor",
-            self._leds_script,
-            [],
-            [],
-            [selector.value, color.value],
-            bytearray(),
+        self._require_running("Cannot set leds when simulation is not running")
+        self._call_script(
+            "setLEDColor", self._leds_script, strings=[selector.value, color.value]
         )
 
     def read_irs(self) -> List[Optional[float]]:
-        ints, _floats, _strings, _buffer = self._sim.callScriptFunction(
-            "readAllIRSensor",
-            self._ir_script,
-            [],
+        return self._call_script(
+            "readAllIRSensor", self._ir_script, parse=lambda ret: list(ret[0])
+        )
+
+    def set_ir_resolution(self, rays_per_sensor: int) -> None:
+        """Set how many proximity rays each simulated IR sensor uses: 16, 8, 4 or 1.
+
+        Every IR sensor is made of 16 proximity sensors, all of which have to be computed
+        every simulation step. Using fewer makes the simulation faster, at the cost of
+        some fidelity. The intensity model is recalibrated for each resolution from the
+        geometry of the rays, to give the readings of 16 rays in front of a wall.
+        That can't match exactly, see `read_ir_resolution_error`.
+
+        This stays in effect when the simulation is stopped and started again
+        through `stop_simulation` and `play_simulation`.
+        """
+        if rays_per_sensor not in IR_RESOLUTIONS:
+            raise ValueError(
+                f"Invalid IR resolution: {rays_per_sensor}. Should be one of {IR_RESOLUTIONS}"
+            )
+        self._ir_rays = rays_per_sensor
+        self._call_sim("setInt32Signal", self._ir_rays_signal, rays_per_sensor)
+
+    def read_ir_resolution(self) -> int:
+        return self._call_sim(
+            "getInt32Signal",
+            self._ir_rays_signal,
+            parse=lambda ret: ret[0] if ret and ret[0] is not None else IR_RESOLUTIONS[0],
+        )
+
+    def read_ir_resolution_error(self) -> float:
+        """The largest relative difference, in front of a wall between 1 and 32 cm away,
+        between the IR readings at the current resolution and those with 16 rays.
+        0.0 at 16 rays.
+        """
+        return self._call_script(
+            "readIRCalibrationError", self._ir_script, parse=lambda ret: float(ret[1][0])
+        )
+
+    def get_image_front(
+        self,
+        *,
+        out: Optional[NDArray[numpy.uint8]] = None,
+        resolution: Optional[Tuple[int, int]] = None,
+        grayscale: bool = False,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+    ) -> NDArray[numpy.uint8]:
+        """Get the image from the front camera as a numpy array in cv2 format (BGR).
+
+        The scaling, grayscale conversion and cropping are done by CoppeliaSim, in one call,
+        so only the pixels that are asked for are sent over.
+
+        Arguments:
+        out: if passed, the image is written into this array, which is returned.
+            Pass the same array every call to not allocate a new image every frame.
+            Should be a contiguous uint8 array of the shape of the image.
+        resolution: (width, height) to render the camera at. The default is that of the scene.
+            Only this read is rendered at it, the resolution of the camera in the scene doesn't change.
+        grayscale: return a (height, width) grayscale image, instead of (height, width, 3) BGR.
+        roi: (x, y, width, height) of the part of the image to return,
+            with (0, 0) the top left, in pixels of `resolution`.
+        """
+        width, height = (0, 0) if resolution is None else (int(resolution[0]), int(resolution[1]))
+        if resolution is not None and (width <= 0 or height <= 0):
+            raise ValueError(f"Invalid camera resolution: {resolution}")
+        x, y, roi_width, roi_height = (0, 0, 0, 0) if roi is None else (int(value) for value in roi)
+        if roi is not None and (roi_width <= 0 or roi_height <= 0):
+            raise ValueError(f"Invalid region of interest: {roi}")
+
+        ints, _floats, _strings, img = self._sim.callScriptFunction(
+            "readCamera",
+            self._smartphone_script,
+            [width, height, int(grayscale), int(self._render_on_demand), x, y, roi_width, roi_height],
             [],
             [],
             bytearray(),
         )
-        return list(ints)
-
-    def get_image_front(self) -> NDArray[numpy.uint8]:
-        img, [resX, resY] = self._sim.getVisionSensorImg(self._smartphone_camera)
-        img = numpy.frombuffer(img, dtype=numpy.uint8).reshape(resY, resX, 3)
-        cv2.flip(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), 0)
-        return img
+        inside, width, height = ints[0:3]
+        if not inside:
+            raise ValueError(f"Region of interest {roi} is not inside the image of {width}x{height}")
+        resX, resY = (width, height) if roi is None else (roi_width, roi_height)
+        # CoppeliaSim sends RGB, with the bottom row first.
+        shape = (resY, resX) if grayscale else (resY, resX, 3)
+        raw = numpy.frombuffer(img, dtype=numpy.uint8).reshape(shape)
+        if out is None:
+            out = numpy.empty(shape, dtype=numpy.uint8)
+        elif out.shape != shape or out.dtype != numpy.uint8 or not out.flags.c_contiguous:
+            raise ValueError(
+                f"`out` should be a contiguous uint8 array of shape {shape}, got {out.dtype} {out.shape}"
+            )
+        # The flip is the only copy, the color conversion is done in place.
+        cv2.flip(raw, 0, dst=out)
+        if not grayscale:
+            cv2.cvtColor(out, cv2.COLOR_RGB2BGR, dst=out)
+        return out
+
+    def set_render_on_demand(self, enabled: bool) -> None:
+        """Whether the front camera only renders when `get_image_front` is called,
+        instead of every simulation step, which makes tasks that don't use it a lot faster.
+        Off by default. Leave it off if scripts in the scene read the camera themselves.
+        """
+        # An explicitly handled sensor is skipped by the simulation loop.
+        self._sim.setExplicitHandling(self._smartphone_camera, 1 if enabled else 0)
+        self._render_on_demand = enabled
+
+    def set_display(self, enabled: bool) -> None:
+        """Turn the rendering of the scene in the CoppeliaSim window on or off.
+        With the display off, the GUI stays responsive, but doesn't draw the scene,
+        which saves the time that takes every step. This has no effect in headless mode.
+        """
+        self._sim.setBoolParam(self._sim.boolparam_display_enabled, enabled)
 
     def set_phone_pan(
         self, pan_position: int, pan_speed: int, blockid: Optional[int] = None
     ) -> int:
-        if not self.is_running():
-            raise RuntimeError("Cannot set phone pan when simulation is not running")
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
+        self._require_running("Cannot set phone pan when simulation is not running")
+        blockid = self._acquire_blockid(blockid)
 
-        self._sim.callScriptFunction(
+        self._call_script(
             "movePanTo",
             self._pan_motor_script,
-            [pan_position, pan_speed],
-            [],
-            [self._block_string(blockid)],
-            bytearray(),
+            ints=[pan_position, pan_speed],
+            strings=[self._block_string(blockid)],
         )
 
         return blockid
 
     def read_phone_pan(self) -> int:
-        ints, _floats, _strings, _buffer = self._sim.callScriptFunction(
+        return self._call_script(
             "readPanPosition",
             self._pan_motor_script,
-            [],
-            [],
-            [],
-            bytearray(),
+            parse=lambda ret: int(ret[0][0]),
         )
-        return int(ints[0])
 
     def set_phone_tilt(
         self, tilt_position: int, tilt_speed: int, blockid: Optional[int] = None
     ) -> int:
-        if not self.is_running():
-            raise RuntimeError("Cannot set phone tilt when simulation is not running")
-        if blockid in self._used_pids:
-            raise ValueError(f"BlockID {blockid} is already in use: {self._used_pids}")
-        blockid = blockid if blockid is not None else self._first_unblocked()
-        self._used_pids.add(blockid)
+        self._require_running("Cannot set phone tilt when simulation is not running")
+        blockid = self._acquire_blockid(blockid)
 
-        self._sim.callScriptFunction(
+        self._call_script(
             "moveTiltTo",
             self._tilt_motor_script,
-            [tilt_position, tilt_speed],
-            [],
-            [self._block_string(blockid)],
-            bytearray(),
+            ints=[tilt_position, tilt_speed],
+            strings=[self._block_string(blockid)],
         )
 
         return blockid
 
     def read_phone_tilt(self) -> int:
-        ints, _floats, _strings, _buffer = self._sim.callScriptFunction(
+        return self._call_script(
             "readTiltPosition",
             self._tilt_motor_script,
-            [],
-            [],
-            [],
-            bytearray(),
+            parse=lambda ret: int(ret[0][0]),
         )
-        return int(ints[0])
 
     def read_accel(self) -> Acceleration:
-        _ints, floats, _strings, _buffer = self._sim.callScriptFunction(
+        return self._call_script(
             "readAccelerationSensor",
             self._smartphone_script,
-            [],
-            [],
-            [],
-            bytearray(),
+            parse=lambda ret: Acceleration(*ret[1]),
         )
-        return Acceleration(*floats)
 
     def read_orientation(self) -> Orientation:
-        _ints, floats, _strings, _buffer = self._sim.callScriptFunction(
+        return self._call_script(
             "readOrientationSensor",
             self._smartphone_script,
-            [],
-            [],
-            [],
-            bytearray(),
+            parse=lambda ret: Orientation(*ret[1]),
         )
-        return Orientation(*floats)
 
     def read_wheels(self) -> WheelPosition:
-        ints, _floats, _strings, _buffer = self._sim.callScriptFunction(
-            "readWheels",
-            self._wheels_script,
-            [],
-            [],
-            [],
-            bytearray(),
+        return self._call_script(
+            "readWheels", self._wheels_script, parse=lambda ret: WheelPosition(*ret[0])
+        )
+
+    def read_all(self) -> SensorSnapshot:
+        return self._call_script(
+            "readAllSensors", self._smartphone_script, parse=_parse_sensor_snapshot
         )
-        return WheelPosition(*ints)
 
     def sleep(self, seconds: float) -> None:
+        self._require_not_batching("Cannot sleep inside a batch")
+        if self._stepping:
+            if not self.is_running():
+                raise RuntimeError("Cannot sleep when simulation is not running")
+            dt = self._sim.getSimulationTimeStep()
+            self.step(max(math.ceil(seconds / dt - 1e-9), 0))
+            return
         start_time = self.get_sim_time()
         while self.get_sim_time() - start_time < seconds:
             if not self.is_running():
                 raise RuntimeError("Cannot sleep when simulation is not running")
             time.sleep(0.02)
 
+    def set_stepping(self, enabled: bool) -> None:
+        # In stepping mode, the simulation only advances when we call `step`,
+        # so it runs in lockstep with this code, as fast as both can go.
+        self._sim.setStepping(enabled)
+        self._stepping = enabled
+
+    def is_stepping(self) -> bool:
+        return self._stepping
+
+    def step(self, n: int = 1) -> None:
+        if not self._stepping:
+            raise RuntimeError("Cannot step the simulation when not in stepping mode")
+        for _ in range(n):
+            self._sim.step()
+
+    def _idler(self) -> Callable[[], None]:
+        # How to wait for the simulation to make progress.
+        # Block signals only change once per simulation step, so checking more often is pointless.
+        if self._stepping:
+            # Nothing happens unless we advance it ourselves.
+            return self._sim.step
+        dt = self._sim.getSimulationTimeStep()
+        if not self.is_running():
+            return lambda: time.sleep(dt)
+        # Waits inside CoppeliaSim until the next step is simulated,
+        # instead of waking up on a timer of our own to ask whether it happened.
+        return lambda: self._sim.wait(dt)
+
     def is_blocked(self, blockid: int) -> bool:
-        res = self._sim.getInt32Signal(self._block_string(blockid))
-        if res == 0:
-            self._used_pids.discard(blockid)
-            print(f"Released blockid {blockid}. Current used PIDs: {self._used_pids}")
-            return False
-        else:
-            self._used_pids.add(blockid)
-            print(f"Blockid {blockid} is still in use. Current used PIDs: {self._used_pids}")
-            return True
+        self._require_not_batching("Cannot check for blocked actions inside a batch")
+        return blockid not in self.completed_blockids([blockid])
 
     def block(self) -> None:
-        while any(self.is_blocked(blockid) for blockid in self._used_pids):
-            time.sleep(0.0000000000002) # added a 00000000000
+        self._require_not_batching("Cannot wait for actions inside a batch")
+        idle = self._idler()
+        while True:
+            self.completed_blockids()
+            if not self._used_pids:
+                return
+            idle()
+
+    def _wait_unblocked(self, blockid: int, timeout: Optional[float] = None) -> bool:
+        self._require_not_batching(
+            "Cannot wait for actions inside a batch. Use the `_async` methods instead."
+        )
+        deadline = None if timeout is None else time.monotonic() + timeout
+        idle = self._idler()
+        while blockid not in self.completed_blockids([blockid]):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            idle()
+        return True
+
+    def _wait_any_unblocked(
+        self, blockids: List[int], timeout: Optional[float] = None
+    ) -> Optional[int]:
+        self._require_not_batching("Cannot wait for actions inside a batch")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        idle = self._idler()
+        while True:
+            completed = self.completed_blockids(blockids)
+            for blockid in blockids:
+                if blockid in completed:
+                    return blockid
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            idle()
+
+    def pending_blockids(self) -> FrozenSet[int]:
+        """The blockids of the actions that are not known to be completed yet.
+        See `completed_blockids` to check on them.
+        """
+        return self._used_pids.snapshot()
+
+    def completed_blockids(self, blockids: Optional[Iterable[int]] = None) -> Set[int]:
+        """Which of these actions are completed, checking all of them in one round trip.
+        Their blockids are released, and their futures are completed.
+        By default, this checks all actions in `pending_blockids`.
+
+        This can be batched, for example to check on several robots at once.
+        """
+        blockids = list(self._used_pids.snapshot() if blockids is None else blockids)
+        if not blockids and self._batch is None:
+            return set()
+        return self._call_script(
+            "readBlockSignals",
+            self._smartphone_script,
+            strings=[self._block_string(blockid) for blockid in blockids],
+            parse=lambda ret: self._release_completed(blockids, ret[0] if ret else []),
+        )
+
+    def _release_completed(self, blockids: List[int], states: List[int]) -> Set[int]:
+        # readBlockSignals returns 1 for each block signal that is still set, 0 if not.
+        completed = set()
+        for blockid, state in zip(blockids, states):
+            if not state:
+                self._release_blockid(blockid)
+                completed.add(blockid)
+        return completed
 
     def play_simulation(self) -> None:
+        self._restore_signals()
         self._sim.startSimulation()
 
+    def _restore_signals(self) -> None:
+        # CoppeliaSim may clear signals when the simulation stops, so set them again.
+        if self._ir_rays is not None:
+            self._sim.setInt32Signal(self._ir_rays_signal, self._ir_rays)
+
+    def save_episode_start(self) -> None:
+        """Remember the current state of the robot, and of the objects in the scene
+        that can move (like food and pushable blocks), for `reset_episode` to return to.
+
+        This is kept by the simulation, and forgotten when it is stopped.
+        """
+        self._require_running("Cannot save the episode start when simulation is not running")
+        self._call_script("saveEpisodeStart", self._smartphone_script)
+
+    def reset_episode(self) -> None:
+        """Put the robot and the objects back where they were at `save_episode_start`,
+        without stopping and starting the simulation, which takes seconds.
+
+        Movements in progress are stopped, and their blockids are released.
+        The wheel encoders are reset, and the food collected is back to what it was.
+        The sensors pick up the new state on the next simulation step.
+        """
+        self._require_not_batching("Cannot reset the episode inside a batch")
+        self._require_running("Cannot reset the episode when simulation is not running")
+        if not self._restore("resetEpisode", []):
+            raise RuntimeError(
+                "No episode start saved since the simulation started. Call save_episode_start first"
+            )
+
+    def save_state(self) -> int:
+        """Save the state of the robot and of the objects in the scene that can move:
+        their poses, velocities, joint positions and the food collected, in one call.
+
+        returns:
+            A token to pass to `restore_state`.
+            Tokens are only valid until the simulation is stopped.
+        """
+        self._require_running("Cannot save the state when simulation is not running")
+        return self._call_script("saveState", self._smartphone_script, parse=lambda ret: int(ret[0][0]))
+
+    def restore_state(self, token: int) -> None:
+        """Go back to a state of `save_state`, in one call,
+        for example to try several actions from the same point of an episode.
+
+        Movements in progress are stopped, and their blockids are released.
+        The token stays valid, so a state can be restored many times.
+        """
+        self._require_not_batching("Cannot restore a state inside a batch")
+        self._require_running("Cannot restore a state when simulation is not running")
+        if not self._restore("restoreState", [token]):
+            raise ValueError(f"Unknown state token: {token}. Tokens are lost when the simulation stops")
+
+    def forget_state(self, token: int) -> None:
+        """Free the memory of a state of `save_state` in the simulation"""
+        self._call_script("forgetState", self._smartphone_script, ints=[token])
+
+    def _restore(self, function: str, ints: List[int]) -> bool:
+        # Cancels all actions, both in the simulation and here.
+        blockids = list(self._used_pids.snapshot())
+        ret, _floats, _strings, _buffer = self._sim.callScriptFunction(
+            function,
+            self._smartphone_script,
+            ints,
+            [],
+            [self._block_string(blockid) for blockid in blockids],
+            bytearray(),
+        )
+        if not ret[0]:
+            return False
+        for blockid in blockids:
+            self._release_blockid(blockid)
+        return True
+
+    def configure_physics(
+        self,
+        dt: Optional[float] = None,
+        realtime: bool = False,
+        engine: Union[PhysicsEngine, str, None] = None,
+        substeps: Optional[int] = None,
+    ) -> PhysicsConfig:
+        """Set how the simulation runs. Can only be done while the simulation is stopped,
+        and takes effect on the next `play_simulation`.
+
+        Arguments:
+        dt: the simulation time step in seconds. Left as it is if None.
+        realtime: whether to run in real time, or as fast as possible.
+        engine: the physics engine, see PhysicsEngine. Left as it is if None.
+        substeps: the amount of physics steps per simulation step. Left as it is if None.
+
+        returns:
+            The configuration now in effect, see `physics_config`
+        """
+        if not self.is_stopped():
+            raise RuntimeError("Cannot configure physics when simulation is not stopped")
+        if dt is not None and dt <= 0:
+            raise ValueError(f"Invalid time step: {dt}")
+        if substeps is not None and substeps < 1:
+            raise ValueError(f"Invalid amount of substeps: {substeps}")
+
+        # Not batched: the child scripts that run batches only exist while the simulation runs.
+        sim = self._sim
+        if dt is not None:
+            sim.setFloatParam(sim.floatparam_simulation_time_step, dt)
+        sim.setBoolParam(sim.boolparam_realtime_simulation, realtime)
+        if engine is not None:
+            engine_id = getattr(sim, f"physics_{PhysicsEngine(engine).value}")
+            sim.setInt32Param(sim.intparam_dynamic_engine, engine_id)
+        if substeps is not None:
+            if dt is None:
+                dt = sim.getFloatParam(sim.floatparam_simulation_time_step)
+            sim.setFloatParam(sim.floatparam_physicstimestep, dt / substeps)
+        return self.physics_config()
+
+    def physics_config(self) -> PhysicsConfig:
+        """The current physics configuration, to store with the results of a run"""
+        sim = self._sim
+        dt = sim.getFloatParam(sim.floatparam_simulation_time_step)
+        physics_dt = sim.getFloatParam(sim.floatparam_physicstimestep)
+        engines = {getattr(sim, f"physics_{engine.value}"): engine for engine in PhysicsEngine}
+        return PhysicsConfig(
+            dt=dt,
+            realtime=bool(sim.getBoolParam(sim.boolparam_realtime_simulation)),
+            engine=engines[sim.getInt32Param(sim.intparam_dynamic_engine)],
+            substeps=max(round(dt / physics_dt), 1),
+        )
+
+    @contextmanager
+    def physics(
+        self,
+        dt: Optional[float] = None,
+        realtime: bool = False,
+        engine: Union[PhysicsEngine, str, None] = None,
+        substeps: Optional[int] = None,
+    ) -> Iterator[PhysicsConfig]:
+        """Like `configure_physics`, but put the previous configuration back after the block.
+        ```
+        with rob.physics(dt=0.01, substeps=2):
+            rob.play_simulation()
+            evaluate(rob)
+            rob.stop_simulation()
+        ```
+        """
+        previous = self.physics_config()
+        try:
+            yield self.configure_physics(dt, realtime, engine, substeps)
+        finally:
+            if self.is_stopped():
+                self.configure_physics(
+                    previous.dt, previous.realtime, previous.engine, previous.substeps
+                )
+            else:
+                self._logger("Simulation still running, could not restore the physics configuration")
+
     def pause_simulation(self) -> None:
         self._sim.pauseSimulation()
         while not self.is_paused():
@@ -297,29 +659,35 @@ class SimulationRobobo(IRobobo):
         return self._sim.getSimulationTime()
 
     def nr_food_collected(self) -> int:
-        ints, _floats, _strings, _buffer = self._sim.callScriptFunction(
-            "remote_get_collected_food",
-            self._food_script,
-            [],
-            [],
-            [],
-            bytearray(),
+        return self._call_script(
+            "remote_get_collected_food", self._food_script, parse=lambda ret: ret[0][0]
         )
-        return ints[0]
 
     def get_position(self) -> Position:
-        pos = self._sim.getObjectPosition(self._robobo, self._sim.handle_world)
-        return Position(*pos)
+        return self._call_sim(
+            "getObjectPosition",
+            self._robobo,
+            self._sim.handle_world,
+            parse=lambda ret: Position(*ret[0]),
+        )
 
     def get_orientation(self) -> Orientation:
-        orient = self._sim.getObjectOrientation(self._robobo, self._sim.handle_world)
-        return Orientation(*orient)
+        return self._call_sim(
+            "getObjectOrientation",
+            self._robobo,
+            self._sim.handle_world,
+            parse=lambda ret: Orientation(*ret[0]),
+        )
 
     def set_position(self, position: Position, orientation: Orientation) -> None:
-        self._sim.setObjectPosition(
-            self._robobo, [position.x, position.y, position.z], self._sim.handle_world
+        self._call_sim(
+            "setObjectPosition",
+            self._robobo,
+            [position.x, position.y, position.z],
+            self._sim.handle_world,
         )
-        self._sim.setObjectOrientation(
+        self._call_sim(
+            "setObjectOrientation",
             self._robobo,
             [orientation.yaw, orientation.pitch, orientation.roll],
             self._sim.handle_world,
@@ -328,8 +696,12 @@ class SimulationRobobo(IRobobo):
     def base_position(self) -> Position:
         if self._base is None:
             raise AttributeError("Scene does not have a base")
-        pos = self._sim.getObjectPosition(self._base, self._sim.handle_world)
-        return Position(*pos)
+        return self._call_sim(
+            "getObjectPosition",
+            self._base,
+            self._sim.handle_world,
+            parse=lambda ret: Position(*ret[0]),
+        )
 
     def base_detects_food(self) -> bool:
         return self._base_food_distance() > 0
@@ -352,11 +724,115 @@ class SimulationRobobo(IRobobo):
             raise AttributeError("Cannot find any food in the scene")
         return ret
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Send all calls made inside this block to CoppeliaSim in one round trip.
+
+        The calls are queued, and run in order by the simulation once the block ends.
+        Methods that return a value return a `BatchResult` instead,
+        of which the `.value` is available after the block:
+        ```
+        with rob.batch():
+            for led in LedId:
+                rob.set_led(led, LedColor.RED)
+            irs = rob.read_irs()
+        print(irs.value)
+        ```
+        Methods that have to wait on the simulation (`sleep`, `move`, the `_blocking` methods)
+        cannot be used inside a batch. Use the `_async` methods instead.
+        Methods that can't be batched (like `get_image_front`) run immediately.
+        Batches can be nested, in which case everything is sent at the end of the outer one.
+        """
+        if self._batch is not None:
+            yield
+            return
+
+        self._batch = []
+        self._batch_needs_running = False
+        try:
+            yield
+            calls = self._batch
+        finally:
+            self._batch = None
+        self._run_batch(calls)
+
+    def _run_batch(self, calls: List[Tuple[List[Any], BatchResult]]) -> None:
+        if not calls:
+            return
+        if self._batch_needs_running and not self.is_running():
+            raise RuntimeError("Cannot send batch when simulation is not running")
+        rets = self._sim.callScriptFunction(
+            "runBatch", self._smartphone_script, [call for call, _result in calls]
+        )
+        for (_call, result), ret in zip(calls, rets):
+            result._set(ret)
+
+    def _call_script(
+        self,
+        function: str,
+        script: int,
+        ints: Optional[List[Any]] = None,
+        floats: Optional[List[float]] = None,
+        strings: Optional[List[str]] = None,
+        parse: Callable[[List[Any]], T] = lambda _ret: None,
+    ) -> T:
+        """Call a function of a Lua script of the scene, or queue it when batching.
+        `parse` turns the returned (ints, floats, strings, buffer) into the result.
+        """
+        # Copied, as a batch keeps the arguments until it is sent.
+        args = [list(ints or []), list(floats or []), list(strings or [])]
+        return self._call(script, function, args, parse)
+
+    def _call_sim(
+        self,
+        function: str,
+        *args: Any,
+        parse: Callable[[List[Any]], T] = lambda _ret: None,
+    ) -> T:
+        """Call a function of the `sim` API, or queue it when batching.
+        `parse` turns the list of returned values into the result.
+        """
+        return self._call(-1, function, list(args), parse)
+
+    def _call(
+        self,
+        script: int,
+        function: str,
+        args: List[Any],
+        parse: Callable[[List[Any]], T],
+    ) -> T:
+        if self._batch is not None:
+            result = BatchResult(parse)
+            self._batch.append(([script, function, args], result))
+            return result  # type: ignore
+
+        if script == -1:
+            ret = getattr(self._sim, function)(*args)
+        else:
+            ret = self._sim.callScriptFunction(function, script, *args, bytearray())
+        # The API returns None, a single value, or a tuple of values.
+        if ret is None:
+            return parse([])
+        return parse(list(ret) if isinstance(ret, tuple) else [ret])
+
+    def _require_running(self, message: str) -> None:
+        # When batching, this is checked once, when the batch is sent.
+        if self._batch is not None:
+            self._batch_needs_running = True
+        elif not self.is_running():
+            raise RuntimeError(message)
+
+    def _require_not_batching(self, message: str) -> None:
+        if self._batch is not None:
+            raise RuntimeError(message)
+
     def _block_string(self, blockid: int) -> str:
         return f"Block_{self._identifier}_{blockid}"
 
     def _initialise_handles(self) -> None:
         self._robobo = self._get_object(f"/Robobo{self._identifier}")
+        # Read by ir_back_c.lua, see `set_ir_resolution`
+        self._ir_rays_signal = f"IR_rays_{self._robobo}"
         self._wheels_script = self._get_childscript(self._get_object(f"/Robobo{self._identifier}/Left_Motor"))
         self._leds_script = self._get_childscript(self._get_object(f"/Robobo{self._identifier}/Back_L"))
         self._ir_script = self._get_childscript(self._get_object(f"/Robobo{self._identifier}/IR_Back_C"))
@@ -409,6 +885,19 @@ class SimulationRobobo(IRobobo):
         quit_hard()
 
 
+def _parse_sensor_snapshot(ret: List[Any]) -> SensorSnapshot:
+    ints, floats = ret[0], ret[1]
+    return SensorSnapshot(
+        irs=list(floats[0:8]),
+        wheels=WheelPosition(*ints[0:4]),
+        orientation=Orientation(*floats[8:11]),
+        accel=Acceleration(*floats[11:14]),
+        phone_pan=int(ints[4]),
+        phone_tilt=int(ints[5]),
+        timestamp=floats[14],
+    )
+
+
 def timeout(func: Callable[[], T], timeout_duration: int = 10) -> T:
     def handler(_signum, _frame):
         raise TimeoutError()
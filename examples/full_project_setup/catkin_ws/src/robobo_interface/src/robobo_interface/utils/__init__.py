@@ -1,3 +1,7 @@
 from .sets import LockedSet
+from .blockids import BlockIdAllocator
+from .tracker import BlockTracker
+from .frames import LatestFrame
+from .history import SensorHistory
 
-__all__ = ("LockedSet",)
+__all__ = ("LockedSet", "BlockIdAllocator", "BlockTracker", "LatestFrame", "SensorHistory")
@@ -0,0 +1,88 @@
+import time
+import threading
+from collections import deque
+
+from typing import Deque, Dict, Set
+
+
+class BlockIdAllocator:
+    """Hands out unique blockids in constant time.
+
+    Free ids are kept in a queue, bounded by the size of the id range.
+    They are handed out oldest-released first, so a blockid isn't reused right
+    after it was released, which gives late completion notifications some slack.
+
+    Blockids picked by the user (instead of handed out) can be reserved,
+    after which they are skipped until they are released again.
+
+    To find blockids that are never released (for example, because a completion
+    notification got lost), it remembers when every id in use was acquired,
+    which can be inspected with `leaked`.
+    """
+
+    def __init__(self, first: int = 1, last: int = 767) -> None:
+        self._first = first
+        self._last = last
+        self._lock = threading.Lock()
+        self._free: Deque[int] = deque(range(first, last + 1))
+        self._queued: Set[int] = set(self._free)
+        self._in_use: Dict[int, float] = {}
+
+        self.acquired = 0
+        self.released = 0
+        self.peak_in_use = 0
+
+    def acquire(self) -> int:
+        """Get an unused blockid"""
+        with self._lock:
+            while self._free:
+                blockid = self._free.popleft()
+                self._queued.discard(blockid)
+                # Reserved by hand while it was in the queue, skip it.
+                if blockid not in self._in_use:
+                    self._mark_used(blockid)
+                    return blockid
+            raise ValueError(
+                f"No available blockids. {len(self._in_use)} are in use: {sorted(self._in_use)}"
+            )
+
+    def reserve(self, blockid: int) -> int:
+        """Mark a blockid chosen by the user as in use"""
+        with self._lock:
+            if blockid in self._in_use:
+                raise ValueError(f"BlockID {blockid} is already in use")
+            self._mark_used(blockid)
+            return blockid
+
+    def release(self, blockid: int) -> None:
+        """Give back a blockid. Releasing an id that is not in use does nothing."""
+        with self._lock:
+            if self._in_use.pop(blockid, None) is None:
+                return
+            self.released += 1
+            if self._first <= blockid <= self._last and blockid not in self._queued:
+                self._free.append(blockid)
+                self._queued.add(blockid)
+
+    def leaked(self, older_than: float = 60.0) -> Dict[int, float]:
+        """Get the blockids that have been in use for more than `older_than` seconds,
+        mapped to how many seconds they have been in use.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                blockid: now - since
+                for blockid, since in self._in_use.items()
+                if now - since > older_than
+            }
+
+    def __contains__(self, blockid: object) -> bool:
+        return blockid in self._in_use
+
+    def __len__(self) -> int:
+        return len(self._in_use)
+
+    def _mark_used(self, blockid: int) -> None:
+        self._in_use[blockid] = time.monotonic()
+        self.acquired += 1
+        self.peak_in_use = max(self.peak_in_use, len(self._in_use))
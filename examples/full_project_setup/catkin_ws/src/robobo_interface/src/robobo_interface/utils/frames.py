@@ -0,0 +1,121 @@
+import time
+import threading
+
+import numpy
+
+from typing import Callable, Optional
+from numpy.typing import NDArray
+
+
+class LatestFrame:
+    """The latest frame of a camera stream, only decoded once someone asks for it.
+
+    `put` is meant to be called from a ROS callback, and only stores the compressed bytes,
+    so frames nobody reads are never decoded. A frame is decoded at most once,
+    every read of the same frame returns the same array.
+
+    With `background`, every frame is instead decoded by a worker thread as soon as it arrives,
+    so neither the callback nor the reader has to wait for the decoding.
+
+    It counts how many frames were received and decoded, for diagnostics.
+    """
+
+    def __init__(
+        self, decode: Callable[[bytes], NDArray[numpy.uint8]], background: bool = False
+    ) -> None:
+        self._decode = decode
+        self._background = background
+        self._changed = threading.Condition(threading.Lock())
+        self._data: Optional[bytes] = None
+        self._stamp: Optional[float] = None
+        self._received_at = 0.0
+        self._seq = 0
+        self._decoded: Optional[NDArray[numpy.uint8]] = None
+        self._decoded_seq = 0
+        self._failed_seq = 0
+        self.received = 0
+        self.decoded = 0
+        if background:
+            threading.Thread(target=self._decode_loop, name="LatestFrame.decode", daemon=True).start()
+
+    def put(self, data: bytes, stamp: float) -> None:
+        """Store a new compressed frame, with the time it was taken"""
+        with self._changed:
+            self._data = data
+            self._stamp = stamp
+            self._received_at = time.monotonic()
+            self._seq += 1
+            self.received += 1
+            self._changed.notify_all()
+
+    @property
+    def stamp(self) -> Optional[float]:
+        """When the latest frame was taken, None if there is none yet"""
+        with self._changed:
+            return self._stamp
+
+    def age(self) -> Optional[float]:
+        """How many seconds ago the latest frame arrived, None if there is none yet"""
+        with self._changed:
+            if self._data is None:
+                return None
+            return time.monotonic() - self._received_at
+
+    def latest(
+        self, max_age: Optional[float] = None, timeout: Optional[float] = None
+    ) -> NDArray[numpy.uint8]:
+        """The latest frame, waiting for a new one if it arrived more than `max_age` seconds ago,
+        or if there is none yet.
+        Raises TimeoutError if it has to wait, and none arrives within `timeout` seconds.
+        """
+        with self._changed:
+            stale = max_age is not None and time.monotonic() - self._received_at > max_age
+            if self._data is None or stale:
+                self._wait_newer(self._seq, timeout)
+        return self._decode_latest()
+
+    def wait_newer(self, timeout: Optional[float] = None) -> NDArray[numpy.uint8]:
+        """Wait for the next frame to arrive, and return it.
+        Raises TimeoutError if none arrives within `timeout` seconds.
+        """
+        with self._changed:
+            self._wait_newer(self._seq, timeout)
+        return self._decode_latest()
+
+    def _wait_newer(self, seq: int, timeout: Optional[float]) -> None:
+        if not self._changed.wait_for(lambda: self._seq > seq, timeout):
+            raise TimeoutError(f"No new frame within {timeout} seconds")
+
+    def _decode_latest(self) -> NDArray[numpy.uint8]:
+        with self._changed:
+            seq, data = self._seq, self._data
+            if self._background:
+                # The worker is on it, this frame or a newer one will do.
+                self._changed.wait_for(lambda: max(self._decoded_seq, self._failed_seq) >= seq)
+            if self._decoded_seq >= seq:
+                return self._decoded  # type: ignore
+        # If the worker failed to decode it, this raises its error here.
+        return self._decode_frame(seq, data)  # type: ignore
+
+    def _decode_frame(self, seq: int, data: bytes) -> NDArray[numpy.uint8]:
+        # Decoded without holding the lock, so new frames can come in meanwhile.
+        image = self._decode(data)
+        with self._changed:
+            if seq > self._decoded_seq:
+                self._decoded, self._decoded_seq = image, seq
+                self.decoded += 1
+                self._changed.notify_all()
+        return image
+
+    def _decode_loop(self) -> None:
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._seq > max(self._decoded_seq, self._failed_seq))
+                seq, data = self._seq, self._data
+            try:
+                self._decode_frame(seq, data)  # type: ignore
+            except Exception:
+                # Skip frames that can't be decoded, instead of stopping the worker.
+                with self._changed:
+                    self._failed_seq = max(self._failed_seq, seq)
+                    self._changed.notify_all()
@@ -0,0 +1,127 @@
+import threading
+
+import numpy
+
+from typing import Optional, Sequence, Tuple
+from numpy.typing import NDArray
+
+
+class SensorHistory:
+    """The last `capacity` readings of a sensor, with the time each was taken.
+
+    The readings are kept in preallocated arrays used as a ring buffer,
+    so appending a reading (from a ROS callback) doesn't allocate anything.
+    Queries return copies, with the oldest reading first.
+    """
+
+    def __init__(self, width: int, capacity: int = 1024) -> None:
+        if capacity < 1:
+            raise ValueError(f"Invalid capacity: {capacity}")
+        self._lock = threading.Lock()
+        self._stamps = numpy.zeros(capacity, dtype=numpy.float64)
+        self._values = numpy.zeros((capacity, width), dtype=numpy.float64)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count
+
+    @property
+    def capacity(self) -> int:
+        return len(self._stamps)
+
+    def append(self, stamp: float, values: Sequence[float]) -> None:
+        with self._lock:
+            self._stamps[self._next] = stamp
+            self._values[self._next] = values
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def latest(self) -> Optional[Tuple[float, NDArray[numpy.float64]]]:
+        """The last (stamp, values), or None if nothing was received yet"""
+        with self._lock:
+            if self._count == 0:
+                return None
+            index = self._next - 1
+            return float(self._stamps[index]), self._values[index].copy()
+
+    def latest_stamp(self) -> Optional[float]:
+        """The stamp of the last reading, or None if nothing was received yet"""
+        with self._lock:
+            if self._count == 0:
+                return None
+            return float(self._stamps[self._next - 1])
+
+    def at(
+        self,
+        stamp: float,
+        out: NDArray[numpy.float64],
+        interpolate: bool = False,
+        periodic: Sequence[int] = (),
+    ) -> Optional[float]:
+        """Write the reading at time `stamp` into `out`, without allocating.
+
+        This is the reading closest in time, or, with `interpolate`, the linear interpolation
+        between the readings before and after it. Outside of the history, the first or last reading is used.
+        Columns listed in `periodic` are angles in degrees, interpolated the short way around.
+
+        returns:
+            How far the closest reading used is from `stamp` in seconds, or None if there are none.
+        """
+        with self._lock:
+            if self._count == 0:
+                return None
+            # Binary search for the first reading after `stamp`, in order of arrival.
+            first = (self._next - self._count) % self.capacity
+            low, high = 0, self._count
+            while low < high:
+                middle = (low + high) // 2
+                if self._stamps[(first + middle) % self.capacity] <= stamp:
+                    low = middle + 1
+                else:
+                    high = middle
+            after = (first + low) % self.capacity
+            before = (first + low - 1) % self.capacity
+
+            if low == 0 or low == self._count:
+                index = after if low == 0 else before
+                out[:] = self._values[index]
+                return abs(float(self._stamps[index]) - stamp)
+
+            t0, t1 = float(self._stamps[before]), float(self._stamps[after])
+            distance = min(stamp - t0, t1 - stamp)
+            if not interpolate or t1 <= t0:
+                out[:] = self._values[before if stamp - t0 <= t1 - stamp else after]
+                return distance
+
+            fraction = (stamp - t0) / (t1 - t0)
+            numpy.subtract(self._values[after], self._values[before], out=out)
+            for column in periodic:
+                out[column] = (out[column] + 180.0) % 360.0 - 180.0
+            out *= fraction
+            out += self._values[before]
+            for column in periodic:
+                out[column] = (out[column] + 180.0) % 360.0 - 180.0
+            return distance
+
+    def last(self, n: int) -> Tuple[NDArray[numpy.float64], NDArray[numpy.float64]]:
+        """The last `n` (or fewer, if there aren't that many) stamps (n,) and values (n, width)"""
+        with self._lock:
+            n = min(max(n, 0), self._count)
+            indices = numpy.arange(self._next - n, self._next) % self.capacity
+            return self._stamps[indices], self._values[indices]
+
+    def between(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> Tuple[NDArray[numpy.float64], NDArray[numpy.float64]]:
+        """The stamps and values of the readings taken from `start` up to and including `end`.
+        None means no bound.
+        """
+        stamps, values = self.last(self.capacity)
+        keep = numpy.ones(len(stamps), dtype=bool)
+        if start is not None:
+            keep &= stamps >= start
+        if end is not None:
+            keep &= stamps <= end
+        return stamps[keep], values[keep]
@@ -0,0 +1,101 @@
+import time
+import threading
+
+from typing import FrozenSet, Generic, Iterable, Iterator, Optional, Set, TypeVar
+
+T = TypeVar("T")
+
+
+class BlockTracker(Generic[T]):
+    """Keeps track of the actions that are currently in flight, by their blockid.
+
+    Unlike LockedSet, this uses a cheap `threading` lock instead of a multiprocessing one,
+    iterating over it iterates over a snapshot (so it can be changed from a ROS callback
+    while you iterate), and it allows to wait for actions to complete.
+
+    It also counts how many actions were started and completed, for diagnostics.
+    """
+
+    def __init__(self) -> None:
+        self._changed = threading.Condition(threading.Lock())
+        self._items: Set[T] = set()
+        self.started = 0
+        self.completed = 0
+
+    def add(self, item: T) -> None:
+        with self._changed:
+            if item not in self._items:
+                self._items.add(item)
+                self.started += 1
+
+    def discard(self, item: T) -> None:
+        with self._changed:
+            if item in self._items:
+                self._items.remove(item)
+                self.completed += 1
+                self._changed.notify_all()
+
+    def snapshot(self) -> FrozenSet[T]:
+        """Get the items currently being tracked"""
+        with self._changed:
+            return frozenset(self._items)
+
+    def wait_for(self, item: T, timeout: Optional[float] = None) -> bool:
+        """Wait until `item` is no longer tracked.
+
+        returns:
+            whether it was removed before the timeout
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: item not in self._items, timeout)
+
+    def wait_for_any(
+        self, items: Iterable[T], timeout: Optional[float] = None
+    ) -> Optional[T]:
+        """Wait until any of `items` is no longer tracked.
+
+        returns:
+            the first item that is no longer tracked, or None on timeout
+        """
+        items = list(items)
+
+        def first_done() -> Optional[T]:
+            return next((item for item in items if item not in self._items), None)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            done = first_done()
+            while done is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+                done = first_done()
+            return done
+
+    def wait_until_empty(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is tracked anymore.
+
+        returns:
+            whether it got empty before the timeout
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: not self._items, timeout)
+
+    @property
+    def outstanding(self) -> int:
+        return len(self)
+
+    def __contains__(self, item: object) -> bool:
+        with self._changed:
+            return item in self._items
+
+    def __len__(self) -> int:
+        with self._changed:
+            return len(self._items)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.snapshot())
+
+    def __repr__(self) -> str:
+        return f"BlockTracker({set(self.snapshot())})"
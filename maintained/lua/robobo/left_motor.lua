@@ -267,3 +267,16 @@ resetWheelEncoders = function(inIntegers, inFloats, inStrings, inBuffer)
     pos_inicial_D = math.floor(sim.getJointPosition(motorD) * 180 / math.pi)
     return {}, {}, {}, ""
 end
+
+stopWheels = function(inIntegers, inFloats, inStrings, inBuffer)
+    -- Para las ruedas y cancela el movimiento en curso, liberando su senal de bloqueo
+    sim.setJointTargetVelocity(motorI, 0)
+    sim.setJointTargetVelocity(motorD, 0)
+    if d > 0 then
+        sim.setInt32Signal(signal, 0)
+    end
+    d = 0
+    vI = 0
+    vD = 0
+    return {}, {}, {}, ""
+end
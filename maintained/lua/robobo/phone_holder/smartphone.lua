@@ -8,6 +8,105 @@ function sysCall_init()
     smartphone_camera = sim.getObject("./Smartphone_camera")
     pos_anterior = sim.getObjectPosition(smartphone, -1)
     pos_antant = sim.getObjectPosition(smartphone, -1)
+    irScript = sim.getScript(sim.scripttype_childscript, sim.getObject(":/IR_Back_C"))
+    wheelsScript = sim.getScript(sim.scripttype_childscript, sim.getObject(":/Left_Motor"))
+    panScript = sim.getScript(sim.scripttype_childscript, sim.getObject(":/Pan_Motor"))
+    tiltScript = sim.getScript(sim.scripttype_childscript, sim.getObject(":/Pan_Motor/Pan_Respondable/Tilt_Motor"))
+    robobo = sim.getObject(":")
+    local comida = sim.getObject("/Food", { noError = true })
+    if comida ~= -1 then
+        foodScript = sim.getScript(sim.scripttype_childscript, comida)
+    end
+    episodio = nil -- El estado guardado por saveEpisodeStart
+    estados = {} -- Los estados guardados por saveState, por su token
+    siguienteToken = 1
+end
+
+local VELOCIDAD_INICIAL = {
+    sim.shapefloatparam_init_velocity_x,
+    sim.shapefloatparam_init_velocity_y,
+    sim.shapefloatparam_init_velocity_z,
+}
+local VELOCIDAD_ANGULAR_INICIAL = {
+    sim.shapefloatparam_init_ang_velocity_x,
+    sim.shapefloatparam_init_ang_velocity_y,
+    sim.shapefloatparam_init_ang_velocity_z,
+}
+
+local function esParteDeRobot(objeto)
+    -- Sube hasta la raiz del arbol del objeto y mira si es un Robobo
+    local padre = sim.getObjectParent(objeto)
+    while padre ~= -1 do
+        objeto = padre
+        padre = sim.getObjectParent(objeto)
+    end
+    return sim.getObjectAlias(objeto):find("^Robobo") ~= nil
+end
+
+local function objetosMoviles()
+    -- Los objetos de este Robobo, y los que se pueden mover de la escena (comida, bloques...)
+    -- sin los de otros Robobos, de los que se encargan sus propios scripts
+    local objetos = sim.getObjectsInTree(robobo)
+    for _, objeto in ipairs(sim.getObjectsInTree(sim.handle_scene, sim.object_shape_type)) do
+        local dinamico = sim.getObjectInt32Param(objeto, sim.shapeintparam_static) == 0
+        local esComida = sim.getObjectAlias(objeto):find("^Food") ~= nil
+        if (dinamico or esComida) and not esParteDeRobot(objeto) then
+            objetos[#objetos + 1] = objeto
+        end
+    end
+    return objetos
+end
+
+local function guardarEstado()
+    -- Las poses y velocidades de los objetos moviles, la posicion de las articulaciones
+    -- y el estado de la comida
+    local estado = { objetos = {} }
+    for _, objeto in ipairs(objetosMoviles()) do
+        local guardado = { handle = objeto, pose = sim.getObjectPose(objeto, sim.handle_world) }
+        local tipo = sim.getObjectType(objeto)
+        if tipo == sim.object_joint_type then
+            guardado.posicion = sim.getJointPosition(objeto)
+        elseif tipo == sim.object_shape_type then
+            guardado.lineal, guardado.angular = sim.getObjectVelocity(objeto)
+        end
+        estado.objetos[#estado.objetos + 1] = guardado
+    end
+    if foodScript then
+        estado.comida = sim.callScriptFunction("remote_get_food_state", foodScript, {}, {}, {}, "")
+    end
+    return estado
+end
+
+local function restaurarEstado(estado)
+    -- Para los motores, y pone todo como estaba en guardarEstado
+    sim.callScriptFunction("stopWheels", wheelsScript, {}, {}, {}, "")
+    sim.callScriptFunction("stopPan", panScript, {}, {}, {}, "")
+    sim.callScriptFunction("stopTilt", tiltScript, {}, {}, {}, "")
+    for _, guardado in ipairs(estado.objetos) do
+        if guardado.posicion then
+            sim.setJointPosition(guardado.handle, guardado.posicion)
+            if sim.getObjectInt32Param(guardado.handle, sim.jointintparam_ctrl_enabled) == 1 then
+                sim.setJointTargetPosition(guardado.handle, guardado.posicion)
+            end
+        end
+        sim.setObjectPose(guardado.handle, sim.handle_world, guardado.pose)
+        if guardado.lineal then
+            -- El motor de fisica aplica estas velocidades al volver a crear el objeto, con resetDynamicObject
+            for i = 1, 3, 1 do
+                sim.setObjectFloatParam(guardado.handle, VELOCIDAD_INICIAL[i], guardado.lineal[i])
+                sim.setObjectFloatParam(guardado.handle, VELOCIDAD_ANGULAR_INICIAL[i], guardado.angular[i])
+            end
+        end
+    end
+    -- Despues de mover los objetos, el motor de fisica tiene que olvidar su estado anterior
+    for _, guardado in ipairs(estado.objetos) do
+        sim.resetDynamicObject(guardado.handle)
+    end
+    if estado.comida then
+        sim.callScriptFunction("remote_set_food_state", foodScript, estado.comida, {}, {}, "")
+    end
+    pos_anterior = sim.getObjectPosition(smartphone, -1)
+    pos_antant = pos_anterior
 end
 
 readOrientationSensor = function(inIntegers, inFloats, inStrings, inBuffer)
@@ -29,3 +128,145 @@ readAccelerationSensor = function(inIntegers, inFloats, inStrings, inBuffer)
     pos_anterior = pos
     return {}, aceleracion, {}, ""
 end
+
+readAllSensors = function(inIntegers, inFloats, inStrings, inBuffer)
+    -- Reune todas las lecturas propioceptivas del mismo paso de simulacion en una sola llamada
+    -- ints: {posRuedaD, posRuedaI, vI, vD, pan, tilt}
+    -- floats: {8 x IR, yaw, pitch, roll, accX, accY, accZ, tiempoSimulacion}
+    local ir = sim.callScriptFunction("readAllIRSensor", irScript, {}, {}, {}, "")
+    local wheels = sim.callScriptFunction("readWheels", wheelsScript, {}, {}, {}, "")
+    local pan = sim.callScriptFunction("readPanPosition", panScript, {}, {}, {}, "")
+    local tilt = sim.callScriptFunction("readTiltPosition", tiltScript, {}, {}, {}, "")
+    local _i, orient = readOrientationSensor({}, {}, {}, "")
+    local _j, accel = readAccelerationSensor({}, {}, {}, "")
+
+    local ints = { wheels[1], wheels[2], wheels[3], wheels[4], pan[1], tilt[1] }
+    local floats = {}
+    for i = 1, 8, 1 do
+        floats[i] = ir[i]
+    end
+    for i = 1, 3, 1 do
+        floats[8 + i] = orient[i]
+        floats[11 + i] = accel[i]
+    end
+    floats[15] = sim.getSimulationTime()
+    return ints, floats, {}, ""
+end
+
+readCamera = function(inIntegers, inFloats, inStrings, inBuffer)
+    -- Lee la imagen de la camara en una sola llamada
+    -- ints: {ancho, alto, gris, renderizar, x, y, anchoRoi, altoRoi}
+    -- ancho y alto 0 para la resolucion de la escena, anchoRoi y altoRoi 0 para la imagen entera,
+    -- con (x, y) la esquina de arriba a la izquierda
+    -- Devuelve {1, ancho, alto} y la imagen, o {0, ancho, alto} si la region no esta dentro de la imagen
+    local resX = sim.getObjectInt32Param(smartphone_camera, sim.visionintparam_resolution_x)
+    local resY = sim.getObjectInt32Param(smartphone_camera, sim.visionintparam_resolution_y)
+    local ancho, alto = resX, resY
+    if inIntegers[1] > 0 then
+        ancho, alto = inIntegers[1], inIntegers[2]
+    end
+    local pos, tamano = { 0, 0 }, { 0, 0 }
+    if inIntegers[7] > 0 then
+        local x, y, anchoRoi, altoRoi = inIntegers[5], inIntegers[6], inIntegers[7], inIntegers[8]
+        if x < 0 or y < 0 or altoRoi <= 0 or x + anchoRoi > ancho or y + altoRoi > alto then
+            return { 0, ancho, alto }, {}, {}, ""
+        end
+        -- CoppeliaSim cuenta las filas desde abajo
+        pos, tamano = { x, alto - y - altoRoi }, { anchoRoi, altoRoi }
+    end
+    local cambiada = ancho ~= resX or alto ~= resY
+    if cambiada then
+        sim.setObjectInt32Param(smartphone_camera, sim.visionintparam_resolution_x, ancho)
+        sim.setObjectInt32Param(smartphone_camera, sim.visionintparam_resolution_y, alto)
+    end
+    if cambiada or inIntegers[4] == 1 then
+        sim.handleVisionSensor(smartphone_camera)
+    end
+    local imagen = sim.getVisionSensorImg(smartphone_camera, inIntegers[3], 0.0, pos, tamano)
+    if cambiada then
+        -- La resolucion de la escena no cambia para las siguientes lecturas ni para otros clientes
+        sim.setObjectInt32Param(smartphone_camera, sim.visionintparam_resolution_x, resX)
+        sim.setObjectInt32Param(smartphone_camera, sim.visionintparam_resolution_y, resY)
+    end
+    return { 1, ancho, alto }, {}, {}, imagen
+end
+
+readBlockSignals = function(inIntegers, inFloats, inStrings, inBuffer)
+    -- Lee varias senales de bloqueo en una sola llamada: 1 si sigue bloqueada, 0 si no
+    local estados = {}
+    for i = 1, #inStrings, 1 do
+        estados[i] = sim.getInt32Signal(inStrings[i]) or 0
+    end
+    return estados, {}, {}, ""
+end
+
+runBatch = function(calls)
+    -- Ejecuta en orden una lista de llamadas y devuelve todos los resultados en una sola respuesta
+    -- Cada llamada es {script, funcion, argumentos}:
+    -- con script -1 se llama a la funcion de la API "sim" con esos argumentos,
+    -- si no, a la funcion del script con {ints, floats, strings}
+    local resultados = {}
+    for i = 1, #calls, 1 do
+        local script, funcion, argumentos = calls[i][1], calls[i][2], calls[i][3]
+        if script == -1 then
+            resultados[i] = { sim[funcion](table.unpack(argumentos)) }
+        else
+            resultados[i] = {
+                sim.callScriptFunction(funcion, script, argumentos[1], argumentos[2], argumentos[3], ""),
+            }
+        end
+    end
+    return resultados
+end
+
+saveEpisodeStart = function(inIntegers, inFloats, inStrings, inBuffer)
+    -- Guarda el estado actual como el inicio de los episodios, para resetEpisode
+    episodio = guardarEstado()
+    return {}, {}, {}, ""
+end
+
+resetEpisode = function(inIntegers, inFloats, inStrings, inBuffer)
+    -- Vuelve al estado de saveEpisodeStart sin parar la simulacion
+    -- inStrings son las senales de bloqueo a liberar
+    -- Devuelve {0} si no hay ningun estado guardado, {1} si no
+    if episodio == nil then
+        return { 0 }, {}, {}, ""
+    end
+    for i = 1, #inStrings, 1 do
+        sim.setInt32Signal(inStrings[i], 0)
+    end
+    restaurarEstado(episodio)
+    sim.callScriptFunction("resetWheelEncoders", wheelsScript, {}, {}, {}, "")
+    return { 1 }, {}, {}, ""
+end
+
+saveState = function(inIntegers, inFloats, inStrings, inBuffer)
+    -- Guarda el estado actual, y devuelve el token con el que restoreState lo puede restaurar
+    local token = siguienteToken
+    siguienteToken = siguienteToken + 1
+    estados[token] = guardarEstado()
+    return { token }, {}, {}, ""
+end
+
+restoreState = function(inIntegers, inFloats, inStrings, inBuffer)
+    -- Vuelve al estado del token inIntegers[1] sin parar la simulacion
+    -- inStrings son las senales de bloqueo a liberar
+    -- Devuelve {0} si el token no existe, {1} si no
+    local estado = estados[inIntegers[1]]
+    if estado == nil then
+        return { 0 }, {}, {}, ""
+    end
+    for i = 1, #inStrings, 1 do
+        sim.setInt32Signal(inStrings[i], 0)
+    end
+    restaurarEstado(estado)
+    return { 1 }, {}, {}, ""
+end
+
+forgetState = function(inIntegers, inFloats, inStrings, inBuffer)
+    -- Libera los estados de los tokens inIntegers
+    for i = 1, #inIntegers, 1 do
+        estados[inIntegers[i]] = nil
+    end
+    return {}, {}, {}, ""
+end